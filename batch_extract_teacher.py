@@ -6,6 +6,7 @@
 依赖：
     - ffmpeg (系统层面，需要 `brew install ffmpeg`)
     - pyannote.audio
+    - torchaudio
     - soundfile
     - numpy
 
@@ -22,12 +23,16 @@
 """
 
 import os
+import json
 import sys
 import argparse
+import contextlib
+import multiprocessing
 import subprocess
 from pathlib import Path
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from time import perf_counter
 from typing import Optional
 import logging
@@ -36,9 +41,8 @@ import numpy as np
 import soundfile as sf
 from pyannote.audio import Pipeline
 import torch
-from scipy.spatial.distance import cdist
+import torchaudio
 from speechbrain.pretrained import EncoderClassifier
-import io
 
 
 VIDEO_EXTS = {".mp4", ".mkv", ".mov", ".avi", ".m4v"}
@@ -113,71 +117,194 @@ def resolve_device(requested: str) -> str:
     return "cpu"
 
 
-def run_ffmpeg_to_wav(input_path: Path, wav_path: Path):
+def _probe_audio(path: Path) -> Optional[dict]:
+    """用 ffprobe 读取首个音频流的 codec/采样率/声道；失败时返回 None。"""
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "json",
+        str(path),
+    ]
+    try:
+        out = subprocess.check_output(cmd, text=True, stderr=subprocess.DEVNULL)
+        streams = json.loads(out).get("streams") or []
+    except Exception:
+        return None
+    return streams[0] if streams else None
+
+
+def _is_target_pcm(info: Optional[dict]) -> bool:
+    """音频流已经是 16kHz 单声道 pcm_s16le 时无需重采样。"""
+    if not info:
+        return False
+    return (
+        info.get("codec_name") == "pcm_s16le"
+        and str(info.get("sample_rate")) == "16000"
+        and int(info.get("channels") or 0) == 1
+    )
+
+
+def run_ffmpeg_to_wav(input_path: Path, wav_path: Path, single_thread: bool = False):
     """
     用 ffmpeg 把任意视频/音频转成 单声道 16kHz 的 wav。
+    音频流已是 16kHz 单声道 PCM 时直接拷贝，不再重编码；
+    single_thread 用于多个 ffmpeg 并行时避免线程超订。
+    先写入临时文件，成功后再 os.replace 到 wav_path，
+    这样中断的运行不会留下被缓存复用的截断 wav。
     """
-    cmd = [
-        "ffmpeg",
-        "-y",            # 覆盖输出
+    part_path = wav_path.with_name(wav_path.stem + ".part.wav")
+    try:
+        _ffmpeg_convert(input_path, part_path, single_thread)
+        os.replace(part_path, wav_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            part_path.unlink()
+        raise
+    return wav_path
+
+
+def _ffmpeg_convert(input_path: Path, wav_path: Path, single_thread: bool):
+    cmd = ["ffmpeg", "-y"]  # 覆盖输出
+    if _is_target_pcm(_probe_audio(input_path)):
+        # 显式选取首个音频流，与 _probe_audio 检查的 a:0 保持一致
+        cmd += ["-i", str(input_path), "-map", "0:a:0", "-vn", "-c:a", "copy", str(wav_path)]
+        logging.info("[ffmpeg] %s -> %s (stream copy)", input_path.name, wav_path.name)
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    if single_thread:
+        cmd += ["-threads", "1"]
+    cmd += [
         "-i", str(input_path),
+        "-map", "0:a:0", # 首个音频流（ffmpeg 默认会挑“最佳”音轨）
+        "-vn",           # 只处理音频流
         "-ac", "1",      # 单声道
         "-ar", "16000",  # 16kHz
+        "-f", "wav",
         str(wav_path),
     ]
     logging.info("[ffmpeg] %s -> %s", input_path.name, wav_path.name)
     subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    return wav_path
+
+
+def _ffmpeg_job(job):
+    """
+    线程池 worker。
+    job = (input_path, wav_path, single_thread)
+    返回 (input_path, wav_path 或 None, 错误信息 或 None)。
+    """
+    input_path, wav_path, single_thread = job
+    try:
+        return input_path, run_ffmpeg_to_wav(input_path, wav_path, single_thread), None
+    except Exception as exc:
+        return input_path, None, str(exc)
 
 
 def convert_videos_to_wav(video_files, tmp_dir: Path, workers: int):
     """Convert all videos to wav in parallel; return dict {video_path: wav_path}."""
     tmp_dir.mkdir(exist_ok=True)
-    jobs = {}
     start = perf_counter()
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        for vf in video_files:
-            wav_path = tmp_dir / (vf.stem + ".wav")
-            jobs[executor.submit(run_ffmpeg_to_wav, vf, wav_path)] = vf
-
-        converted = {}
-        for fut in as_completed(jobs):
-            src = jobs[fut]
-            try:
-                converted[src] = fut.result()
-                logging.debug("ffmpeg completed: %s", src.name)
-            except Exception as exc:
-                logging.error("ffmpeg failed for %s: %s", src, exc)
+
+    converted = {}
+    pending = []
+    for vf in video_files:
+        wav_path = tmp_dir / (vf.stem + ".wav")
+        # 幂等：上次运行已转好的 wav 直接复用
+        if wav_path.exists() and wav_path.stat().st_size > 0:
+            logging.debug("ffmpeg skipped (cached): %s", vf.name)
+            converted[vf] = wav_path
+        else:
+            pending.append(vf)
+
+    workers = max(1, min(workers, len(pending)))
+    if pending:
+        single_thread = workers > 1
+        jobs = [(vf, tmp_dir / (vf.stem + ".wav"), single_thread) for vf in pending]
+        # worker 只是等待 ffmpeg 子进程（等待时释放 GIL），用线程即可；
+        # 进程池在 spawn 模式下会让每个 worker 重新导入 torch/pyannote 等重型依赖。
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for src, wav_path, err in executor.map(_ffmpeg_job, jobs):
+                if err is None:
+                    converted[src] = wav_path
+                    logging.debug("ffmpeg completed: %s", src.name)
+                else:
+                    logging.error("ffmpeg failed for %s: %s", src, err)
 
     elapsed = perf_counter() - start
-    logging.info("Converted %d file(s) to wav in %.1fs using %d worker(s)", len(converted), elapsed, workers)
+    rate = len(pending) / elapsed if elapsed > 0 else 0.0
+    logging.info(
+        "Converted %d file(s) to wav in %.1fs using %d worker(s) (%.2f files/s, %d cached)",
+        len(converted),
+        elapsed,
+        workers,
+        rate,
+        len(video_files) - len(pending),
+    )
     return converted
 
 
+class LazyWav:
+    """
+    只读 wav 的按需切片视图：`audio[start:end]` 通过 seek + read 读取对应帧，
+    返回 float32 单声道 np.ndarray，整文件无需常驻内存。
+    """
+
+    def __init__(self, path: Path):
+        self._sf = sf.SoundFile(str(path), "r")
+        self.samplerate = self._sf.samplerate
+        self.frames = self._sf.frames
+
+    def __len__(self):
+        return self.frames
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("LazyWav only supports contiguous slices")
+        start, stop, _ = key.indices(self.frames)
+        if stop <= start:
+            return np.empty(0, dtype=np.float32)
+        self._sf.seek(start)
+        data = self._sf.read(stop - start, dtype="float32")
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        return data
+
+    def close(self):
+        self._sf.close()
+
+
 def diarize_file(pipeline: Pipeline, wav_path: Path, sr_target=16000):
     """
     对一个 wav 文件做说话人分离，返回：
-      audio: np.ndarray (mono)
+      audio: LazyWav（按需读取片段，切片得到 mono float32 np.ndarray）
       sr: 采样率
-      diarization: pyannote 对象
+      segments_by_speaker: 每个说话人的 [(start_s, end_s), ...] dict
       speaker_durations: 每个说话人总时长 dict
     """
     start_t = perf_counter()
-    audio, sr = sf.read(str(wav_path))
-    if audio.ndim > 1:
-        audio = np.mean(audio, axis=1)
+    # 只解码一次：把波形放在内存里交给 pipeline，避免 pyannote 再次读盘解码
+    waveform, sr = torchaudio.load(str(wav_path))
 
     if sr != sr_target:
         # 一般不会发生，因为我们 ffmpeg 已经指定了 16kHz
         raise ValueError(f"Unexpected sample rate {sr}, expected {sr_target}")
 
     logging.info("[diarization] %s", wav_path.name)
-    diarization = pipeline(str(wav_path))
+    diarization = pipeline({"waveform": waveform, "sample_rate": sr})
+    # 分离完成后释放整段波形，后续切片改为从磁盘按需读取
+    del waveform
+    audio = LazyWav(wav_path)
 
-    speaker_durations = defaultdict(float)
+    # 只遍历一次 itertracks，后续统计与收集都复用这份结果
+    segments_by_speaker = defaultdict(list)
     for segment, _, speaker in diarization.itertracks(yield_label=True):
-        duration = segment.end - segment.start
-        speaker_durations[speaker] += duration
+        segments_by_speaker[speaker].append((segment.start, segment.end))
+
+    speaker_durations = {
+        spk: sum(e - s for s, e in segs) for spk, segs in segments_by_speaker.items()
+    }
 
     logging.info("  speaker durations (seconds):")
     for spk, dur in speaker_durations.items():
@@ -186,167 +313,373 @@ def diarize_file(pipeline: Pipeline, wav_path: Path, sr_target=16000):
     elapsed = perf_counter() - start_t
     logging.info("[diarization-time] %s processed in %.1fs", wav_path.name, elapsed)
 
-    return audio, sr, diarization, speaker_durations
+    return audio, sr, segments_by_speaker, speaker_durations
 
 
 def collect_teacher_segments(
-    audio: np.ndarray,
+    audio,
     sr: int,
-    diarization,
+    segments_by_speaker: dict,
     speaker_durations,
-    target_samples: int,
-    collected_samples: int,
+    out_buf: np.ndarray,
+    out_offset: int,
     min_seg_seconds: float,
 ):
     """
     从当前文件中，取“说话最多的 speaker”的语音片段，
     过滤掉过短的片段（< min_seg_seconds），
-    返回：新增的 chunks 列表、更新后的 collected_samples。
-    如果 target 已达成，则返回空列表。
+    直接写入预分配的 out_buf[out_offset:]，返回更新后的 out_offset。
+    out_buf 写满即视为达到目标时长。
     """
-    if collected_samples >= target_samples:
-        return [], collected_samples
+    if out_offset >= len(out_buf) or not speaker_durations:
+        return out_offset
 
     # 选这个文件中说话时间最长的 speaker 作为“老师”
     teacher_speaker = max(speaker_durations, key=speaker_durations.get)
     logging.info("  -> assume teacher in this file: %s", teacher_speaker)
 
-    chunks = []
-    min_seg_samples = int(min_seg_seconds * sr)
-
-    for segment, _, speaker in diarization.itertracks(yield_label=True):
-        if speaker != teacher_speaker:
-            continue
-
-        start = int(segment.start * sr)
-        end = int(segment.end * sr)
-        seg_len = end - start
-
-        # 过滤掉太短、太碎的片段
-        if seg_len < min_seg_samples:
-            continue
-
-        # 如果这一段加上去会超过总长度，就截断到刚好 target
-        remaining = target_samples - collected_samples
-        if remaining <= 0:
-            break
-
-        if seg_len > remaining:
-            end = start + remaining
-            seg_len = end - start
-
-        chunk = audio[start:end]
-        if len(chunk) > 0:
-            chunks.append(chunk)
-            collected_samples += len(chunk)
-
-        if collected_samples >= target_samples:
-            break
-
-    return chunks, collected_samples
+    return collect_chunks_for_speakers(
+        audio,
+        sr,
+        segments_by_speaker,
+        [teacher_speaker],
+        out_buf,
+        out_offset,
+        min_seg_seconds,
+    )
 
 
 def norm_vec(x):
+    """L2 归一化：1-D 向量整体归一化，2-D 矩阵按行归一化（一次向量化完成）。"""
     x = np.asarray(x, dtype=np.float32)
-    return x / (np.linalg.norm(x) + 1e-8)
+    if x.ndim == 1:
+        return x / (np.linalg.norm(x) + 1e-8)
+    return x / (np.linalg.norm(x, axis=-1, keepdims=True) + 1e-8)
+
+
+@lru_cache(maxsize=4)
+def _cached_speaker_encoder(run_device: str):
+    # 失败时直接抛出异常，lru_cache 不会缓存，下次调用会重新加载
+    encoder = EncoderClassifier.from_hparams(
+        source="speechbrain/spkrec-ecapa-voxceleb",
+        run_opts={"device": run_device},
+        savedir=".cache/spkrec_ecapa_voxceleb",
+    )
+    encoder.eval()
+    return encoder
 
 
 def load_speaker_encoder(device: str = "cpu"):
-    """Load speechbrain ECAPA encoder on chosen device."""
+    """Load speechbrain ECAPA encoder on chosen device (successful loads are cached per device)."""
+    run_device = device if device in ("cpu", "mps", "cuda") else "cpu"
     try:
-        run_device = device if device in ("cpu", "mps", "cuda") else "cpu"
-        return EncoderClassifier.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            run_opts={"device": run_device},
-            savedir=".cache/spkrec_ecapa_voxceleb",
-        )
+        return _cached_speaker_encoder(run_device)
     except Exception as e:
         logging.error("Failed to load speaker encoder: %s", e)
         return None
 
 
-def embedding_from_file(encoder: EncoderClassifier, path_or_buffer):
-    emb = None
-    try:
-        emb = encoder.encode_file(str(path_or_buffer)).squeeze()
-    except Exception:
-        # try file-like (BytesIO)
-        emb = encoder.encode_file(path_or_buffer).squeeze()
+def embedding_from_file(encoder: EncoderClassifier, path):
+    with torch.inference_mode():
+        emb = encoder.encode_file(str(path)).squeeze()
 
     if hasattr(emb, "cpu"):
         emb = emb.detach().cpu().numpy()
     return norm_vec(emb)
 
 
-def segment_embedding(encoder: EncoderClassifier, audio: np.ndarray, sr: int, start_s: float, end_s: float):
-    start = int(start_s * sr)
-    end = int(end_s * sr)
-    seg = audio[start:end]
-    if seg.size == 0:
-        return None
-    buf = io.BytesIO()
-    sf.write(buf, seg, sr, format="WAV")
-    buf.seek(0)
-    try:
-        return embedding_from_file(encoder, buf)
-    except Exception as e:
-        logging.debug("segment_embedding failed: %s", e)
-        return None
+def _autocast_ctx(device):
+    """CUDA/MPS 上以 fp16 autocast 运行 encoder 前向；CPU 保持 fp32。"""
+    device_type = torch.device(str(device)).type
+    if device_type == "cuda":
+        return torch.autocast(device_type="cuda", dtype=torch.float16)
+    if device_type == "mps":
+        try:
+            return torch.autocast(device_type="mps", dtype=torch.float16)
+        except Exception:
+            # 旧版 torch 不支持 mps autocast
+            return contextlib.nullcontext()
+    return contextlib.nullcontext()
+
+
+def encode_segments(encoder: EncoderClassifier, waveforms):
+    """
+    把多段 1-D 波形补齐成一个 batch，一次 encode_batch 前向得到所有 embedding。
+    返回形状为 (n, D) 的 float32 numpy 数组（未归一化）。
+    """
+    tensors = [torch.as_tensor(np.asarray(w, dtype=np.float32)) for w in waveforms]
+    lens = torch.tensor([t.shape[0] for t in tensors], dtype=torch.float32)
+    wavs = torch.nn.utils.rnn.pad_sequence(tensors, batch_first=True)
+    wav_lens = lens / lens.max()
+
+    run_device = getattr(encoder, "device", "cpu")
+    wavs = wavs.to(run_device)
+    wav_lens = wav_lens.to(run_device)
 
+    with torch.inference_mode(), _autocast_ctx(run_device):
+        emb = encoder.encode_batch(wavs, wav_lens).squeeze(1)
+    return emb.detach().float().cpu().numpy()
 
-def speaker_cluster_centroid(encoder: EncoderClassifier, audio: np.ndarray, sr: int, segments, max_samples_per_cluster=6):
+
+def _tokenize(
+    audio,
+    sr: int,
+    start_s: float,
+    end_s: float,
+    win: float = 3.0,
+    hop: float = 1.5,
+    rms_thr_db: float = -35.0,
+    frame_ms: int = 30,
+    shift_ms: int = 10,
+    speech_frac: float = 0.6,
+):
+    """
+    把一个语音片段切成固定长度的 token（默认 3s 窗、1.5s 步长），
+    并用简单的能量 VAD 过滤：帧 RMS 相对片段内最大值低于 rms_thr_db 视为静音，
+    有声帧占比不足 speech_frac 的 token 被丢弃。短于 win 的片段整体作为一个 token。
+    返回 [(start_s, end_s), ...]。
+    """
+    seg = audio[int(start_s * sr):int(end_s * sr)]
+    frame_len = int(sr * frame_ms / 1000)
+    shift = int(sr * shift_ms / 1000)
+    if len(seg) < frame_len:
+        return []
+
+    frames = np.lib.stride_tricks.sliding_window_view(seg, frame_len)[::shift]
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    db = 20.0 * np.log10(rms + 1e-10)
+    voiced = db >= db.max() + rms_thr_db
+
+    win_n = int(win * sr)
+    hop_n = int(hop * sr)
+    if len(seg) <= win_n:
+        offsets = [0]
+        win_n = len(seg)
+    else:
+        offsets = range(0, len(seg) - win_n + 1, hop_n)
+
+    tokens = []
+    for off in offsets:
+        f0 = off // shift
+        f1 = max(f0 + 1, (off + win_n - frame_len) // shift + 1)
+        if voiced[f0:f1].mean() >= speech_frac:
+            tokens.append((start_s + off / sr, start_s + (off + win_n) / sr))
+    return tokens
+
+
+def speaker_cluster_centroid(encoder: EncoderClassifier, audio: np.ndarray, sr: int, segments, max_samples_per_cluster=24):
+    """
+    用定长 token（而不是整段）估计簇质心：encoder 开销由 token 数上限决定，
+    与簇的总时长无关。所有 token 一次 encode_batch。
+    """
     if not segments:
         return None
     n = min(len(segments), max_samples_per_cluster)
     indices = np.linspace(0, len(segments) - 1, n, dtype=int)
-    embs = []
+    tokens = []
     for i in indices:
         s, e = segments[i]
-        emb = segment_embedding(encoder, audio, sr, s, e)
-        if emb is not None:
-            embs.append(emb)
-    if not embs:
+        tokens.extend(_tokenize(audio, sr, s, e))
+    if not tokens:
+        return None
+    if len(tokens) > max_samples_per_cluster:
+        keep = np.linspace(0, len(tokens) - 1, max_samples_per_cluster, dtype=int)
+        tokens = [tokens[i] for i in keep]
+
+    waveforms = [audio[int(s * sr):int(e * sr)] for s, e in tokens]
+    try:
+        embs = encode_segments(encoder, waveforms)
+    except Exception as e:
+        logging.debug("speaker_cluster_centroid failed: %s", e)
         return None
-    centroid = np.mean(embs, axis=0)
+    centroid = norm_vec(embs).mean(axis=0)
     return norm_vec(centroid)
 
 
+def _sample_ranges(segments, sr: int):
+    """把 [(start_s, end_s), ...] 一次性换算成 int64 采样区间 (starts, ends)。"""
+    if not segments:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    idx = (np.asarray(segments, dtype=np.float64).reshape(-1, 2) * sr).astype(np.int64)
+    return idx[:, 0], idx[:, 1]
+
+
 def collect_chunks_for_speakers(
-    audio: np.ndarray,
+    audio,
     sr: int,
     segments_by_speaker: dict,
     speakers_to_keep: list,
-    target_samples: int,
-    collected_samples: int,
+    out_buf: np.ndarray,
+    out_offset: int,
     min_seg_seconds: float,
 ):
-    chunks = []
+    target_samples = len(out_buf)
     min_seg_samples = int(min_seg_seconds * sr)
     for spk in speakers_to_keep:
-        for (start_s, end_s) in segments_by_speaker.get(spk, []):
-            start = int(start_s * sr)
-            end = int(end_s * sr)
-            seg_len = end - start
-            if seg_len < min_seg_samples:
-                continue
+        remaining = target_samples - out_offset
+        if remaining <= 0:
+            return out_offset
 
-            remaining = target_samples - collected_samples
-            if remaining <= 0:
-                return chunks, collected_samples
+        starts, ends = _sample_ranges(segments_by_speaker.get(spk, []), sr)
+        lens = ends - starts
+        mask = lens >= min_seg_samples
+        starts, ends, lens = starts[mask], ends[mask], lens[mask]
+        if lens.size == 0:
+            continue
 
-            if seg_len > remaining:
-                end = start + remaining
-                seg_len = end - start
+        # 累计长度首次达到 remaining 的那一段是最后需要的一段；
+        # 截断量在循环外一次算好，循环内只剩切片拷贝
+        cum = np.cumsum(lens)
+        last = int(np.searchsorted(cum, remaining, side="left"))
+        starts = starts[:last + 1]
+        ends = ends[:last + 1].copy()
+        if last < len(cum):
+            ends[-1] -= cum[last] - remaining
 
+        for start, end in zip(starts.tolist(), ends.tolist()):
             chunk = audio[start:end]
-            if len(chunk) > 0:
-                chunks.append(chunk)
-                collected_samples += len(chunk)
+            n = len(chunk)
+            if n > 0:
+                out_buf[out_offset:out_offset + n] = chunk
+                out_offset += n
+
+            if out_offset >= target_samples:
+                return out_offset
+
+    return out_offset
+
 
-            if collected_samples >= target_samples:
-                return chunks, collected_samples
+def load_diarization_pipeline(hf_token: str, device: str):
+    """加载 pyannote diarization pipeline 并移动到指定设备。"""
+    pipeline = Pipeline.from_pretrained(
+        "pyannote/speaker-diarization",
+        use_auth_token=hf_token,
+    )
+    if hasattr(pipeline, "to"):
+        pipeline.to(torch.device(device))
+    elif device != "cpu":
+        logging.warning("Pipeline object has no .to(); falling back to CPU")
+    return pipeline
 
-    return chunks, collected_samples
+
+def extract_teacher_audio(
+    pipeline: Pipeline,
+    wav_path: Path,
+    sr_target: int,
+    out_buf: np.ndarray,
+    out_offset: int,
+    min_seg_seconds: float,
+    encoder: Optional[EncoderClassifier] = None,
+    teacher_emb: Optional[np.ndarray] = None,
+    sim_threshold: float = 0.80,
+    min_cluster_duration: float = 0.0,
+):
+    """
+    处理单个 wav：说话人分离 -> 选出老师的簇 -> 把片段写入 out_buf[out_offset:]。
+    提供 teacher_emb 时按 embedding 相似度选簇，否则（或无簇达标时）按时长选。
+    返回更新后的 out_offset。
+    """
+    audio, sr, segments_by_speaker, speaker_durations = diarize_file(
+        pipeline, wav_path, sr_target=sr_target
+    )
+
+    try:
+        kept_speakers = []
+        # If teacher embedding available, compute centroids and pick matching clusters
+        if teacher_emb is not None and encoder is not None:
+            # compute centroids for clusters that exceed min_cluster_duration
+            speaker_centroids = {}
+            for spk, segs in segments_by_speaker.items():
+                total_dur = speaker_durations[spk]
+                if total_dur < min_cluster_duration:
+                    continue
+                cent = speaker_cluster_centroid(encoder, audio, sr, segs)
+                if cent is not None:
+                    speaker_centroids[spk] = (cent, total_dur)
+
+            if speaker_centroids:
+                # 所有向量均已 L2 归一化，余弦相似度即点积；一次矩阵乘法算完所有簇
+                keys = list(speaker_centroids)
+                centroids = np.stack([speaker_centroids[k][0] for k in keys]).astype(np.float32)
+                sims = centroids @ teacher_emb.astype(np.float32)
+                for spk, sim in zip(keys, sims):
+                    tot = speaker_centroids[spk][1]
+                    logging.info("  sim teacher <-> %s: %.3f (cluster dur %.1fs)", spk, float(sim), tot)
+                    if sim >= sim_threshold:
+                        kept_speakers.append(spk)
+
+            if not kept_speakers:
+                logging.info("No clusters passed teacher-similarity threshold; falling back to duration-based selection")
+
+        if kept_speakers:
+            return collect_chunks_for_speakers(
+                audio,
+                sr,
+                segments_by_speaker,
+                kept_speakers,
+                out_buf,
+                out_offset,
+                min_seg_seconds,
+            )
+        # fallback: pick speaker by duration as before
+        return collect_teacher_segments(
+            audio,
+            sr,
+            segments_by_speaker,
+            speaker_durations,
+            out_buf,
+            out_offset,
+            min_seg_seconds,
+        )
+    finally:
+        audio.close()
+
+
+# 进程池 worker 内的常驻对象（每个进程加载一次）
+_WORKER_STATE = {}
+
+# 分离进程池统一用 spawn：主进程此时已用过 torch/OpenMP（老师样本编码），
+# fork 出的子进程继承其线程池状态并不安全。
+_DIARIZE_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _configure_worker_threads(num_threads: Optional[int]):
+    """
+    worker 内只设置 intra-op 线程数。
+    torch 启动后不允许再修改 inter-op 线程数（会抛 RuntimeError），
+    若在 initializer 里失败，整个进程池会变成 BrokenProcessPool。
+    """
+    if num_threads:
+        torch.set_num_threads(max(1, num_threads))
+
+
+def _init_diarize_worker(hf_token: str, num_threads: Optional[int], log_level: str):
+    configure_logging(log_level)
+    _configure_worker_threads(num_threads)
+    _WORKER_STATE["pipeline"] = load_diarization_pipeline(hf_token, "cpu")
+
+
+def process_wav(wav_path: Path, opts: dict) -> np.ndarray:
+    """
+    进程池 worker：处理一个 wav，返回该文件收集到的老师音频（最多 target_samples）。
+    """
+    encoder = load_speaker_encoder("cpu") if opts.get("teacher_emb") is not None else None
+
+    buf = np.empty(opts["target_samples"], dtype=np.float32)
+    n = extract_teacher_audio(
+        _WORKER_STATE["pipeline"],
+        wav_path,
+        opts["sr_target"],
+        buf,
+        0,
+        opts["min_seg"],
+        encoder=encoder,
+        teacher_emb=opts.get("teacher_emb"),
+        sim_threshold=opts["sim_threshold"],
+        min_cluster_duration=opts["min_cluster_duration"],
+    )
+    return buf[:n]
 
 
 def main():
@@ -393,7 +726,7 @@ def main():
         "--num-threads",
         type=int,
         default=None,
-        help="限制 torch/BLAS 线程数，避免 CPU 争用",
+        help="限制 torch/BLAS 线程数，避免 CPU 争用；CPU 模式下同时按 物理核心数/该值 并行处理多个文件",
     )
     parser.add_argument(
         "--log-level",
@@ -454,138 +787,109 @@ def main():
     device = resolve_device(args.device)
     logging.info("Using device: %s", device)
 
-    # 加载 diarization pipeline（加载一次，多文件复用）
-    logging.info("Loading pyannote pipeline (first run will download weights)...")
-    pipeline = Pipeline.from_pretrained(
-        "pyannote/speaker-diarization",
-        use_auth_token=args.hf_token,
-    )
-    if hasattr(pipeline, "to"):
-        pipeline.to(torch.device(device))
-    elif device != "cpu":
-        logging.warning("Pipeline object has no .to(); falling back to CPU")
-
     ffmpeg_workers = args.ffmpeg_workers or min(4, detect_physical_cores())
     ffmpeg_workers = max(1, ffmpeg_workers)
 
-    all_chunks = []
+    # 直接把片段写进预分配的输出缓冲区，避免 chunks 列表 + 最终 concatenate 的二次拷贝
+    teacher_audio = np.empty(target_samples, dtype=np.float32)
     collected_samples = 0
 
+    # 老师示例的 embedding 与文件无关：加载 encoder 并编码一次，所有视频复用
+    encoder = None
+    teacher_emb = None
+    if args.teacher_sample:
+        encoder = load_speaker_encoder(device if device else "cpu")
+        if encoder is None:
+            logging.warning("Speaker encoder not available, falling back to duration-based selection")
+        else:
+            try:
+                teacher_emb = embedding_from_file(encoder, args.teacher_sample)
+            except Exception as e:
+                logging.error("Failed to encode teacher sample: %s", e)
+                teacher_emb = None
+            if teacher_emb is None:
+                logging.warning("Teacher embedding not available, falling back to duration-based selection")
+
     # 临时 wav 存放目录
     tmp_dir = input_dir / "_tmp_wav"
     wav_map = convert_videos_to_wav(video_files, tmp_dir, ffmpeg_workers)
 
-    try:
-        for vf in video_files:
-            if collected_samples >= target_samples:
-                logging.info("Already reached target duration, stop processing more files.")
-                break
-
-            wav_path = wav_map.get(vf)
-            if not wav_path:
-                logging.warning("Skipping %s because wav conversion failed", vf.name)
-                continue
-
-            audio, sr, diarization, speaker_durations = diarize_file(
-                pipeline, wav_path, sr_target=sr_target
-            )
+    wav_paths = []
+    for vf in video_files:
+        wav_path = wav_map.get(vf)
+        if not wav_path:
+            logging.warning("Skipping %s because wav conversion failed", vf.name)
+            continue
+        wav_paths.append(wav_path)
 
-            # build segments by speaker from diarization
-            segments_by_speaker = defaultdict(list)
-            for segment, _, speaker in diarization.itertracks(yield_label=True):
-                segments_by_speaker[speaker].append((segment.start, segment.end))
-
-            # If teacher sample provided, compute centroids and pick matching clusters
-            if args.teacher_sample:
-                encoder = load_speaker_encoder(device if device else "cpu")
-                if encoder is None:
-                    logging.warning("Speaker encoder not available, falling back to duration-based selection")
-                    chunks, collected_samples = collect_teacher_segments(
-                        audio,
-                        sr,
-                        diarization,
-                        speaker_durations,
-                        target_samples,
-                        collected_samples,
-                        args.min_seg,
-                    )
-                else:
+    # CPU 上多文件并行分离：每个 worker 用 --num-threads 个线程；未指定时保持串行
+    diarize_workers = 1
+    if device == "cpu" and args.num_threads:
+        diarize_workers = max(1, min(detect_physical_cores() // max(1, args.num_threads), len(wav_paths)))
+
+    try:
+        if diarize_workers > 1:
+            logging.info("Diarizing %d file(s) with %d CPU worker(s)", len(wav_paths), diarize_workers)
+            opts = {
+                "sr_target": sr_target,
+                "target_samples": target_samples,
+                "min_seg": args.min_seg,
+                "teacher_emb": teacher_emb,
+                "sim_threshold": args.sim_threshold,
+                "min_cluster_duration": args.min_cluster_duration,
+            }
+            with ProcessPoolExecutor(
+                max_workers=diarize_workers,
+                mp_context=_DIARIZE_MP_CONTEXT,
+                initializer=_init_diarize_worker,
+                initargs=(args.hf_token, args.num_threads, args.log_level),
+            ) as executor:
+                futures = [executor.submit(process_wav, wp, opts) for wp in wav_paths]
+                # 按提交顺序写入，保证输出顺序与串行一致
+                for fut in futures:
+                    if collected_samples >= target_samples:
+                        logging.info("Already reached target duration, stop processing more files.")
+                        break
                     try:
-                        teacher_emb = embedding_from_file(encoder, args.teacher_sample)
-                    except Exception as e:
-                        logging.error("Failed to encode teacher sample: %s", e)
-                        teacher_emb = None
-
-                    if teacher_emb is None:
-                        logging.warning("Teacher embedding not available, falling back to duration-based selection")
-                        chunks, collected_samples = collect_teacher_segments(
-                            audio,
-                            sr,
-                            diarization,
-                            speaker_durations,
-                            target_samples,
-                            collected_samples,
-                            args.min_seg,
-                        )
-                    else:
-                        # compute centroids for clusters that exceed min_cluster_duration
-                        speaker_centroids = {}
-                        for spk, segs in segments_by_speaker.items():
-                            total_dur = sum(e - s for s, e in segs)
-                            if total_dur < args.min_cluster_duration:
-                                continue
-                            cent = speaker_cluster_centroid(encoder, audio, sr, segs)
-                            if cent is not None:
-                                speaker_centroids[spk] = (cent, total_dur)
-
-                        kept_speakers = []
-                        for spk, (cent, tot) in speaker_centroids.items():
-                            sim = 1 - cdist([teacher_emb], [cent], metric="cosine")[0][0]
-                            logging.info("  sim teacher <-> %s: %.3f (cluster dur %.1fs)", spk, sim, tot)
-                            if sim >= args.sim_threshold:
-                                kept_speakers.append(spk)
-
-                        if not kept_speakers:
-                            logging.info("No clusters passed teacher-similarity threshold; falling back to duration-based selection")
-                            chunks, collected_samples = collect_teacher_segments(
-                                audio,
-                                sr,
-                                diarization,
-                                speaker_durations,
-                                target_samples,
-                                collected_samples,
-                                args.min_seg,
-                            )
-                        else:
-                            chunks, collected_samples = collect_chunks_for_speakers(
-                                audio,
-                                sr,
-                                segments_by_speaker,
-                                kept_speakers,
-                                target_samples,
-                                collected_samples,
-                                args.min_seg,
-                            )
-            else:
-                # fallback: pick speaker by duration as before
-                chunks, collected_samples = collect_teacher_segments(
-                    audio,
-                    sr,
-                    diarization,
-                    speaker_durations,
-                    target_samples,
+                        chunk = fut.result()
+                    except Exception as exc:
+                        logging.error("Diarization worker failed: %s", exc)
+                        continue
+                    n = min(len(chunk), target_samples - collected_samples)
+                    teacher_audio[collected_samples:collected_samples + n] = chunk[:n]
+                    collected_samples += n
+                    logging.info("  collected so far: %.1fs", collected_samples / sr_target)
+                for fut in futures:
+                    fut.cancel()
+        else:
+            # 加载 diarization pipeline（加载一次，多文件复用）
+            logging.info("Loading pyannote pipeline (first run will download weights)...")
+            pipeline = load_diarization_pipeline(args.hf_token, device)
+
+            for wav_path in wav_paths:
+                if collected_samples >= target_samples:
+                    logging.info("Already reached target duration, stop processing more files.")
+                    break
+
+                collected_samples = extract_teacher_audio(
+                    pipeline,
+                    wav_path,
+                    sr_target,
+                    teacher_audio,
                     collected_samples,
                     args.min_seg,
+                    encoder=encoder,
+                    teacher_emb=teacher_emb,
+                    sim_threshold=args.sim_threshold,
+                    min_cluster_duration=args.min_cluster_duration,
                 )
+                logging.info("  collected so far: %.1fs", collected_samples / sr_target)
 
-            logging.info("  collected so far: %.1fs", collected_samples / sr)
-            all_chunks.extend(chunks)
-
-        if not all_chunks:
+        if collected_samples == 0:
             logging.warning("没有收集到任何老师语音片段，可能录音太短或分离失败。")
             return
 
-        teacher_audio = np.concatenate(all_chunks)
+        teacher_audio = teacher_audio[:collected_samples]
         duration_sec = len(teacher_audio) / sr_target
         logging.info("Final teacher audio duration: %.1f seconds", duration_sec)
 
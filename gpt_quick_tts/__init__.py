@@ -3,27 +3,42 @@
 This package isolates the main building blocks (config, styles, OpenAI client,
 audio output, state management, and the prompt-toolkit UI) so the application
 can be reused or extended without relying on a single monolithic script.
+
+Exports are resolved lazily (PEP 562) so that importing a single submodule,
+e.g. ``gpt_quick_tts.cli``, does not drag in openai/pygame/prompt_toolkit.
 """
-from .config import AppConfig, ConfigStore, default_config_path
-from .styles import DEFAULT_STYLES, VOICES, StyleState, build_style_prefix
-from .audio import AudioOutput
-from .openai_client import OpenAITTSClient
-from .engine import TTSEngine, TTSCallbacks
-from .state import ConsoleState
-from .ui.app import ConsoleApp
-
-__all__ = [
-    "AppConfig",
-    "ConfigStore",
-    "default_config_path",
-    "DEFAULT_STYLES",
-    "VOICES",
-    "StyleState",
-    "build_style_prefix",
-    "AudioOutput",
-    "OpenAITTSClient",
-    "TTSEngine",
-    "TTSCallbacks",
-    "ConsoleState",
-    "ConsoleApp",
-]
+from importlib import import_module
+
+__version__ = "0.1.0"
+
+_EXPORTS = {
+    "AppConfig": ".config",
+    "ConfigStore": ".config",
+    "default_config_path": ".config",
+    "DEFAULT_STYLES": ".styles",
+    "STYLE_TOKENS": ".styles",
+    "VOICES": ".styles",
+    "StyleState": ".styles",
+    "build_style_prefix": ".styles",
+    "AudioOutput": ".audio",
+    "OpenAITTSClient": ".openai_client",
+    "TTSEngine": ".engine",
+    "TTSCallbacks": ".engine",
+    "ConsoleState": ".state",
+    "ConsoleApp": ".ui.app",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
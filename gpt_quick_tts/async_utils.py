@@ -3,6 +3,7 @@ from __future__ import annotations
 """Run asyncio coroutines on a dedicated background thread."""
 
 import asyncio
+import concurrent.futures
 import threading
 from typing import Optional
 
@@ -17,8 +18,8 @@ class AsyncLoopThread:
     def __init__(self):
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_future: Optional[asyncio.Future] = None
         self._started = threading.Event()
-        self._stop_requested = threading.Event()
         self._thread.start()
         self._started.wait()
 
@@ -26,32 +27,50 @@ class AsyncLoopThread:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         self._loop = loop
+        self._stop_future = loop.create_future()
         self._started.set()
         try:
             loop.run_until_complete(self._main())
         finally:
+            try:
+                # Cancel work still in flight (e.g. a streaming request) so its
+                # cleanup runs and callers waiting on it are released.
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            except Exception:
+                pass
             try:
                 loop.close()
             except Exception:
                 pass
 
     async def _main(self):
-        while not self._stop_requested.is_set():
-            await asyncio.sleep(0.1)
+        # Idle until stop() resolves the future; no periodic wakeups.
+        await self._stop_future
 
-    def run_coroutine(self, coro, timeout: Optional[float] = None):
-        """Submit a coroutine to the background loop and wait for the result."""
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the background loop without waiting for it."""
         if not self._loop:
             raise RuntimeError("Async loop not started")
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result(timeout=timeout)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run_coroutine(self, coro, timeout: Optional[float] = None):
+        """Submit a coroutine to the background loop and wait for the result."""
+        return self.submit(coro).result(timeout=timeout)
+
+    def _resolve_stop(self):
+        if not self._stop_future.done():
+            self._stop_future.set_result(None)
 
     def stop(self, timeout: float = 2.0):
         """Request loop shutdown and join the thread."""
-        self._stop_requested.set()
-        if self._loop:
+        if self._loop and self._stop_future:
             try:
-                self._loop.call_soon_threadsafe(lambda: None)
+                self._loop.call_soon_threadsafe(self._resolve_stop)
             except Exception:
+                # Loop already closed.
                 pass
         self._thread.join(timeout=timeout)
@@ -1,49 +1,252 @@
 """Audio playback helper using pygame."""
 from __future__ import annotations
 
+import io
+import os
 import tempfile
+import threading
 from pathlib import Path
-import pygame
+from typing import Callable, Iterable, Optional, Union
+
+# Keep pygame's import banner out of the terminal UI.
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# pygame is imported on first playback (see _import_pygame); importing it
+# initialises SDL and costs a noticeable slice of startup.
+pygame = None
+
+# OpenAI's "pcm" response format: 24 kHz, signed 16-bit little-endian, mono.
+PCM_SAMPLE_RATE = 24000
+PCM_SAMPLE_SIZE = -16
+PCM_CHANNELS = 1
+# SDL mixer buffer in samples: 512 is ~21 ms at 24 kHz, well below the 4096
+# default, so audio reaches the device sooner after play()/queue(). Systems
+# that crackle or underrun under load can raise it via TTS_MIXER_BUFFER
+# (e.g. 2048 or 4096) at the cost of a little start-up latency.
+DEFAULT_MIXER_BUFFER_SAMPLES = 512
+
+
+def _mixer_buffer_samples() -> int:
+    try:
+        samples = int(os.getenv("TTS_MIXER_BUFFER", DEFAULT_MIXER_BUFFER_SAMPLES))
+    except ValueError:
+        return DEFAULT_MIXER_BUFFER_SAMPLES
+    return samples if samples > 0 else DEFAULT_MIXER_BUFFER_SAMPLES
+
+
+MIXER_BUFFER_SAMPLES = _mixer_buffer_samples()
+# Streamed PCM is handed to the mixer in blocks of roughly this duration.
+PCM_BLOCK_SECONDS = 0.2
+# Block sizes selectable at runtime, indexed by latency mode (0 = safest, 3 =
+# fastest start). Smaller blocks start sooner but underrun more easily on a
+# slow connection.
+# Must have config.LATENCY_MODES entries.
+LATENCY_BLOCK_SECONDS = (0.4, PCM_BLOCK_SECONDS, 0.1, 0.05)
+# How often blocking playback checks whether the mixer has finished.
+PLAYBACK_POLL_SECONDS = 0.01
+
+
+def _import_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+
+        pygame = _pygame
+    return pygame
+
+
+def _wait_until_idle(is_busy: Callable[[], bool], stop: Callable[[], None], cancel: Optional[threading.Event]) -> bool:
+    """Block while ``is_busy()``; call ``stop()`` and return False if cancelled.
+
+    Sleeping on the cancel event (rather than pygame.time.wait) means a
+    cancel request wakes the loop immediately instead of after the next tick.
+    """
+    if cancel is None:
+        cancel = threading.Event()
+    while is_busy():
+        if cancel.wait(PLAYBACK_POLL_SECONDS):
+            stop()
+            return False
+    return True
 
 
 class AudioPlayer:
-    """Thin wrapper around pygame.mixer for blocking playback."""
+    """Thin wrapper around pygame.mixer for blocking playback.
+
+    The mixer is opened on first use rather than at construction, so sessions
+    that never play anything do not hold (or spin) the audio device.
+    """
 
     def __init__(self):
-        self._audio_available = False
+        # None until the mixer has been tried; then True/False.
+        self._audio_available: Optional[bool] = None
+        self._init_error: Optional[str] = None
+        # The first call can come from a fetch worker and the player at once;
+        # only one of them may open (or close) the mixer.
+        self._init_lock = threading.Lock()
+        self._channel = None
+        # In-memory source of the current music track; SDL reads it lazily.
+        self._current_buffer: Optional[io.BytesIO] = None
+
+    def _ensure_mixer(self) -> bool:
+        if self._audio_available is None:
+            with self._init_lock:
+                if self._audio_available is None:
+                    self._open_mixer()
+        return self._audio_available
+
+    def _open_mixer(self) -> None:
         try:
-            pygame.mixer.init()
-        except Exception:
+            _import_pygame()
+            # Match the mixer to the streamed PCM format so chunks can be queued
+            # without conversion; compressed formats are resampled by SDL.
+            # allowedchanges=0 makes SDL convert to the device's native format
+            # itself, rather than opening the mixer at that format (e.g. 48 kHz
+            # stereo) and leaving raw PCM unplayable.
+            pygame.mixer.pre_init(
+                frequency=PCM_SAMPLE_RATE,
+                size=PCM_SAMPLE_SIZE,
+                channels=PCM_CHANNELS,
+                buffer=MIXER_BUFFER_SAMPLES,
+                allowedchanges=0,
+            )
+            pygame.mixer.init(allowedchanges=0)
+        except Exception as exc:
+            self._init_error = str(exc) or exc.__class__.__name__
             self._audio_available = False
         else:
             self._audio_available = True
 
     def available(self) -> bool:
-        return self._audio_available
+        return self._ensure_mixer()
+
+    def describe_error(self) -> Optional[str]:
+        """Return why the mixer could not be opened, if it failed."""
+        return self._init_error
 
-    def play_bytes(self, audio_bytes: bytes) -> None:
-        """Play provided audio bytes (assumed to be an MP3 by default)."""
-        if not self._audio_available:
+    def play_bytes(
+        self,
+        audio_bytes: Union[bytes, bytearray, memoryview],
+        cancel: Optional[threading.Event] = None,
+        audio_format: str = "mp3",
+    ) -> None:
+        """Play provided encoded audio bytes (MP3 unless ``audio_format`` says otherwise).
+
+        Playback stops early once ``cancel`` is set.
+        """
+        if not self._ensure_mixer():
             raise RuntimeError("Audio playback not available")
 
-        with tempfile.NamedTemporaryFile(mode="wb", suffix=".mp3", delete=False) as tmp:
+        buffer = io.BytesIO(audio_bytes)
+        try:
+            # Load straight from memory; avoids a temp file per utterance.
+            pygame.mixer.music.load(buffer, audio_format)
+        except Exception:
+            self._play_via_tempfile(audio_bytes, cancel, audio_format)
+            return
+
+        # The decoder streams from the buffer during playback, so hold a
+        # reference until it finishes.
+        self._current_buffer = buffer
+        try:
+            self._play_loaded(cancel)
+        finally:
+            # Release SDL's handle on the buffer before dropping it (pygame 2.0+).
+            unload = getattr(pygame.mixer.music, "unload", None)
+            if unload:
+                unload()
+            self._current_buffer = None
+
+    def _play_via_tempfile(
+        self,
+        audio_bytes: Union[bytes, bytearray, memoryview],
+        cancel: Optional[threading.Event] = None,
+        audio_format: str = "mp3",
+    ) -> None:
+        """Fallback for pygame builds that cannot load from file-like objects."""
+        with tempfile.NamedTemporaryFile(mode="wb", suffix=f".{audio_format}", delete=False) as tmp:
             tmp.write(audio_bytes)
             tmp_filename = tmp.name
 
         try:
             pygame.mixer.music.load(tmp_filename)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(20)
+            self._play_loaded(cancel)
         finally:
             try:
                 Path(tmp_filename).unlink()
             except Exception:
                 pass
 
+    def _play_loaded(self, cancel: Optional[threading.Event] = None) -> None:
+        pygame.mixer.music.play()
+        _wait_until_idle(pygame.mixer.music.get_busy, pygame.mixer.music.stop, cancel)
+
+    def play_pcm_stream(
+        self,
+        chunks: Iterable[bytes],
+        cancel: Optional[threading.Event] = None,
+        block_seconds: float = PCM_BLOCK_SECONDS,
+    ) -> None:
+        """Play raw PCM chunks as they arrive, blocking until playback ends.
+
+        Chunks are coalesced into ~``block_seconds`` blocks and queued on a
+        dedicated mixer channel, so playback starts with the first block while
+        later ones are still being received. Setting ``cancel`` stops the
+        channel and returns without playing the remaining audio.
+        """
+        if not self._ensure_mixer():
+            raise RuntimeError("Audio playback not available")
+        if pygame.mixer.get_init() != (PCM_SAMPLE_RATE, PCM_SAMPLE_SIZE, PCM_CHANNELS):
+            raise RuntimeError("Mixer format does not match streamed PCM")
+
+        channel = self._pcm_channel()
+        frame_bytes = abs(PCM_SAMPLE_SIZE) // 8 * PCM_CHANNELS
+        block_bytes = int(PCM_SAMPLE_RATE * block_seconds) * frame_bytes
+        pending = bytearray()
+
+        for chunk in chunks:
+            pending += chunk
+            if len(pending) >= block_bytes:
+                usable = len(pending) - len(pending) % frame_bytes
+                self._queue_pcm(channel, bytes(pending[:usable]))
+                del pending[:usable]
+
+        if cancel is not None and cancel.is_set():
+            channel.stop()
+            return
+
+        usable = len(pending) - len(pending) % frame_bytes
+        if usable:
+            self._queue_pcm(channel, bytes(pending[:usable]))
+
+        _wait_until_idle(channel.get_busy, channel.stop, cancel)
+
+    def _pcm_channel(self):
+        if self._channel is None:
+            pygame.mixer.set_reserved(1)
+            self._channel = pygame.mixer.Channel(0)
+        return self._channel
+
+    @staticmethod
+    def _queue_pcm(channel, data: bytes) -> None:
+        sound = pygame.mixer.Sound(buffer=data)
+        if not channel.get_busy():
+            channel.play(sound)
+            return
+        # A channel holds one queued sound; wait for the slot to free up.
+        while channel.get_queue() is not None:
+            pygame.time.wait(5)
+        channel.queue(sound)
+
     def quit(self):
-        if self._audio_available:
-            pygame.mixer.quit()
+        with self._init_lock:
+            if self._audio_available:
+                pygame.mixer.quit()
+                self._channel = None
+            self._audio_available = None
+
+    # ConsoleApp._cleanup releases the device through close().
+    close = quit
 
 
 # Backwards-compatible name expected across the codebase
@@ -2,18 +2,16 @@ from __future__ import annotations
 
 """Entrypoint for the GPT-Quick-TTS console app."""
 
+import argparse
 import os
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from .async_utils import AsyncLoopThread
-from .audio import AudioOutput
+from . import __version__
 from .config import ConfigStore
-from .engine import TTSEngine
-from .openai_client import OpenAITTSClient
-from .state import ConsoleState
-from .styles import DEFAULT_STYLES, VOICES, StyleState
-from .ui.app import ConsoleApp
+
+if TYPE_CHECKING:
+    from .ui.app import ConsoleApp
 
 
 def _resolve_api_key(config_store: ConfigStore) -> Optional[str]:
@@ -41,6 +39,16 @@ def _resolve_api_key(config_store: ConfigStore) -> Optional[str]:
 
 
 def build_app() -> ConsoleApp:
+    # Heavy dependencies (openai, pygame, prompt_toolkit) are imported here so
+    # argument parsing and early exits stay fast.
+    from .async_utils import AsyncLoopThread
+    from .audio import AudioOutput
+    from .engine import TTSEngine
+    from .openai_client import OpenAITTSClient
+    from .state import ConsoleState
+    from .styles import DEFAULT_STYLES, VOICES, StyleState
+    from .ui.app import ConsoleApp
+
     config_store = ConfigStore()
     styles = StyleState(DEFAULT_STYLES)
     voices = VOICES
@@ -50,19 +58,30 @@ def build_app() -> ConsoleApp:
     client = OpenAITTSClient(api_key=api_key, async_runner=async_runner)
     audio = AudioOutput()
     engine = TTSEngine(client, audio)
+    # The audio device is opened on first playback; failures are logged then.
     state = ConsoleState(config_store, styles, voices)
 
-    if not audio.available():
-        err = audio.describe_error() or "unknown reason"
-        state.add_log(f"Audio initialization failed: {err}")
-
     def shutdown():
+        config_store.flush()
+        state.close()
+        client.close()
         async_runner.stop(timeout=2.0)
 
     return ConsoleApp(state, engine, on_shutdown=shutdown)
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="gpt_quick_tts",
+        description="Interactive text-to-speech console powered by OpenAI's GPT TTS API.",
+        epilog="Environment: OPENAI_API_KEY, OPENAI_BASE_URL, TTS_CONFIG_PATH, TTS_LOG_PATH, TTS_AUDIO_FORMAT, TTS_MIXER_BUFFER.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    parse_args(argv)
     try:
         app = build_app()
         app.run()
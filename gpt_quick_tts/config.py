@@ -2,15 +2,41 @@ from __future__ import annotations
 
 """Configuration helpers for GPT-Quick-TTS."""
 
+import atexit
 import json
 import os
+import sys
 import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, NamedTuple, Optional
+
+try:  # Optional speedup; the stdlib json module is used when unavailable.
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
 
 
 DEFAULT_CONFIG_FILENAME = "tts_config.json"
+# ``slots=True`` drops the per-instance __dict__ where supported (3.10+).
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+# Delay used by ConfigStore.schedule_save to coalesce bursts of UI toggles.
+SAVE_DEBOUNCE_SECONDS = 0.2
+# Streaming latency modes: indexes into audio.LATENCY_BLOCK_SECONDS.
+LATENCY_MODES = 4
+DEFAULT_LATENCY_MODE = 1
+
+
+def _dumps(data: Dict[str, object]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Dict[str, object]:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
 def default_config_path() -> Path:
@@ -21,25 +47,35 @@ def default_config_path() -> Path:
     return Path(__file__).resolve().parent.parent / DEFAULT_CONFIG_FILENAME
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class AppConfig:
     """Serialized configuration for the console app."""
 
     voice: str = "alloy"
-    streaming: bool = False
+    # Streamed playback starts with the first audio block, so it is the default.
+    streaming: bool = True
+    # Index into audio.LATENCY_BLOCK_SECONDS (streamed playback buffering).
+    latency_mode: int = DEFAULT_LATENCY_MODE
     api_key: Optional[str] = None
     styles: Dict[str, bool] = field(default_factory=dict)
 
-    def ensure_style_defaults(self, style_names: list[str]) -> None:
+    def ensure_style_defaults(self, style_names: Iterable[str]) -> None:
         """Add missing style keys so toggling is predictable."""
         for name in style_names:
             self.styles.setdefault(name, False)
 
     @classmethod
     def from_dict(cls, data: Dict[str, object]) -> "AppConfig":
+        # A bad value here must not discard the rest of the file (api key,
+        # voice, styles), so only this field falls back to its default.
+        try:
+            latency_mode = int(data.get("latency_mode", DEFAULT_LATENCY_MODE))
+        except (TypeError, ValueError):
+            latency_mode = DEFAULT_LATENCY_MODE
         return cls(
             voice=str(data.get("voice", "alloy")),
-            streaming=bool(data.get("streaming", False)),
+            streaming=bool(data.get("streaming", True)),
+            latency_mode=latency_mode,
             api_key=data.get("api_key") or None,
             styles=dict(data.get("styles") or {}),
         )
@@ -48,36 +84,129 @@ class AppConfig:
         return {
             "voice": self.voice,
             "streaming": bool(self.streaming),
+            "latency_mode": int(self.latency_mode),
             "api_key": self.api_key,
             "styles": dict(self.styles),
         }
 
 
+class _CachedDocument(NamedTuple):
+    mtime: int
+    data: Dict[str, object]
+    raw: bytes
+
+
 class ConfigStore:
-    """Thread-safe loader/saver for AppConfig."""
+    """Loader/saver for AppConfig.
+
+    The last parsed/written document is cached together with the file's
+    mtime, so repeated loads of an unchanged file skip the JSON parse and
+    saves that would write identical content are skipped entirely. The cache
+    is a single immutable tuple swapped by assignment, so readers never see a
+    half-updated entry and need no lock.
+
+    ``schedule_save`` batches writes: calls within one window share a single
+    timer and a single ``save`` of the latest snapshot. Call ``flush`` on
+    shutdown to write anything still pending; it is also registered with
+    ``atexit`` as a safety net. Saves are serialized, since the timer,
+    an explicit ``flush`` and the atexit hook can all reach ``save`` at once
+    and share the same temp file.
+    """
 
     def __init__(self, path: Optional[Path] = None):
         self.path = path or default_config_path()
-        self._lock = threading.Lock()
+        self._cache: Optional[_CachedDocument] = None
+        self._pending_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._pending: Optional[AppConfig] = None
+        self._timer: Optional[threading.Timer] = None
+        self._atexit_registered = False
 
     def load(self) -> AppConfig:
-        if not self.path.exists():
-            return AppConfig()
-
+        cache = self._cache
+        if cache is not None:
+            # Only a single stat is needed to validate the cache.
+            mtime = self._current_mtime()
+            if mtime is None:
+                return AppConfig()
+            if mtime == cache.mtime:
+                return AppConfig.from_dict(cache.data)
+
+        # EAFP: open directly rather than exists() + open(); the mtime comes
+        # from the already-open descriptor.
         try:
-            with self.path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            return AppConfig.from_dict(data)
+            with self.path.open("rb") as f:
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+                raw = f.read()
+            data = _loads(raw)
+            cfg = AppConfig.from_dict(data)
+        except FileNotFoundError:
+            return AppConfig()
         except Exception:
             # Fall back to defaults if file is corrupted.
             return AppConfig()
 
+        self._cache = _CachedDocument(mtime, data, raw)
+        return cfg
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
     def save(self, cfg: AppConfig) -> None:
-        with self._lock:
+        data = cfg.to_dict()
+        raw = _dumps(data)
+        with self._save_lock:
+            self._write(data, raw)
+
+    def _write(self, data: Dict[str, object], raw: bytes) -> None:
+        cache = self._cache
+        if cache is not None and raw == cache.raw and self._current_mtime() == cache.mtime:
+            return
+
+        # Write a sibling temp file and atomically swap it in, so a crash
+        # mid-write never leaves a truncated config behind. No fsync: the
+        # rename is enough for consistency and keeps saves cheap.
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
             try:
+                tmp_path.write_bytes(raw)
+            except FileNotFoundError:
                 self.path.parent.mkdir(parents=True, exist_ok=True)
-                with self.path.open("w", encoding="utf-8") as f:
-                    json.dump(cfg.to_dict(), f, indent=2, ensure_ascii=False)
-            except Exception:
-                # Best-effort; do not raise to the UI.
+                tmp_path.write_bytes(raw)
+            os.replace(tmp_path, self.path)
+            self._cache = _CachedDocument(self.path.stat().st_mtime_ns, data, raw)
+        except Exception:
+            # Best-effort; do not raise to the UI.
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def schedule_save(self, cfg: AppConfig, delay: float = SAVE_DEBOUNCE_SECONDS) -> None:
+        """Save ``cfg`` within ``delay`` seconds, batched with any other calls in that window."""
+        snapshot = AppConfig.from_dict(cfg.to_dict())
+        with self._pending_lock:
+            self._pending = snapshot
+            if self._timer is not None:
+                # The pending timer will write this newer snapshot.
                 return
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Write any pending scheduled save immediately."""
+        with self._pending_lock:
+            cfg = self._pending
+            self._pending = None
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        if cfg is not None:
+            self.save(cfg)
@@ -2,18 +2,64 @@ from __future__ import annotations
 
 """Service layer responsible for turning text into audio and playing it."""
 
+import re
+import sys
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
-from .audio import AudioOutput
+from .audio import LATENCY_BLOCK_SECONDS, PCM_BLOCK_SECONDS, AudioOutput
 from .openai_client import OpenAITTSClient
-from .styles import StyleState
 
 
-@dataclass
+# ``slots=True`` drops the per-instance __dict__ where supported (3.10+).
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Sentence boundaries: ./!/? followed by whitespace (so "3.14" never splits),
+# or CJK full-width terminators, which are not followed by spaces.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])")
+# A boundary right after one of these is not treated as the end of a sentence.
+_ABBREVIATIONS = ("Dr.", "Mr.", "Mrs.", "Ms.", "Prof.", "St.", "vs.", "e.g.", "i.e.", "a.m.", "p.m.", "AM.", "PM.")
+# Shorter pieces are merged with their neighbour to avoid choppy requests.
+MIN_SENTENCE_CHARS = 10
+# Recently synthesized clips kept in memory so repeated inputs replay without
+# a network round trip; bounded by both entry count and total size.
+AUDIO_CACHE_ENTRIES = 32
+AUDIO_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+def split_sentences(text: str, min_chars: int = MIN_SENTENCE_CHARS) -> List[str]:
+    """Split ``text`` into sentence-sized pieces for pipelined synthesis."""
+    text = text.strip()
+    spans = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        piece = text[start:match.start()]
+        if len(piece) < min_chars or piece.endswith(_ABBREVIATIONS):
+            continue
+        spans.append((start, match.start()))
+        start = match.end()
+
+    if start < len(text):
+        if spans and len(text) - start < min_chars:
+            # Fold a short tail into the previous sentence.
+            spans[-1] = (spans[-1][0], len(text))
+        else:
+            spans.append((start, len(text)))
+    return [text[a:b] for a, b in spans]
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class TTSCallbacks:
     on_status: Optional[Callable[[str], None]] = None
     on_log: Optional[Callable[[str], None]] = None
+    # Set by the caller to abort the job; checked between chunks and before playback.
+    cancel_event: Optional[threading.Event] = None
+
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
 
     def log(self, message: str) -> None:
         if self.on_log:
@@ -24,6 +70,43 @@ class TTSCallbacks:
             self.on_status(status)
 
 
+# Shared no-op callbacks used when speak() is called without any.
+_NULL_CALLBACKS = TTSCallbacks()
+
+
+def _recording(chunks: Iterable[bytes], sink: bytearray) -> Iterator[bytes]:
+    """Pass chunks through, appending each one to ``sink``."""
+    try:
+        for chunk in chunks:
+            sink += chunk
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def _until_cancelled(chunks: Iterable[bytes], callbacks: TTSCallbacks) -> Iterator[bytes]:
+    """Pass chunks through until the job is cancelled, then close the source.
+
+    Reports "Playing" as soon as the first chunk arrives, since playback
+    starts with the first block rather than after the whole download.
+    """
+    started = False
+    try:
+        for chunk in chunks:
+            if callbacks.cancelled():
+                break
+            if not started:
+                started = True
+                callbacks.status("Playing")
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
 class TTSEngine:
     """High-level engine that orchestrates TTS requests and playback."""
 
@@ -31,45 +114,141 @@ class TTSEngine:
         self.client = client
         self.audio = audio
         self.model = model
+        # (model, voice, styled text, format) -> audio, least recently used first.
+        self._cache: "OrderedDict[Tuple[str, str, str, str], Union[bytes, bytearray]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
 
-    def speak(self, text: str, voice: str, styles: StyleState, streaming: bool, callbacks: Optional[TTSCallbacks] = None) -> None:
-        callbacks = callbacks or TTSCallbacks()
-        raw_text = text.strip()
-        if not raw_text:
+    def _cached_audio(self, key: Tuple[str, str, str, str]) -> Optional[Union[bytes, bytearray]]:
+        with self._cache_lock:
+            audio_bytes = self._cache.get(key)
+            if audio_bytes is not None:
+                self._cache.move_to_end(key)
+            return audio_bytes
+
+    def _remember_audio(self, key: Tuple[str, str, str, str], audio_bytes: Union[bytes, bytearray]) -> None:
+        size = len(audio_bytes)
+        if not size or size > AUDIO_CACHE_MAX_BYTES:
             return
+        with self._cache_lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= len(previous)
+            self._cache[key] = audio_bytes
+            self._cache_bytes += size
+            while len(self._cache) > AUDIO_CACHE_ENTRIES or self._cache_bytes > AUDIO_CACHE_MAX_BYTES:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def _prepare(self, text: str, prefix: str, callbacks: TTSCallbacks) -> Optional[str]:
+        """Validate the request and return the styled input, or None to skip it."""
+        raw_text = text.strip()
+        if not raw_text or callbacks.cancelled():
+            return None
 
         if not self.audio.available():
             callbacks.status("Error")
-            callbacks.log("Error: Audio playback not available")
+            reason = self.audio.describe_error()
+            if reason:
+                callbacks.log(f"Error: Audio playback not available ({reason})")
+            else:
+                callbacks.log("Error: Audio playback not available")
             callbacks.status("Idle")
-            return
+            return None
 
-        prefix = styles.build_prefix()
-        full_text = prefix + raw_text
+        # Only copy the (possibly large) input when there is a prefix to add.
+        full_text = "".join((prefix, raw_text)) if prefix else raw_text
 
         callbacks.log(f"Processing: {raw_text[:50]}...")
         callbacks.status("Sending")
+        return full_text
+
+    def _fetch(self, full_text: str, voice: str, callbacks: TTSCallbacks) -> Optional[bytearray]:
+        key = (self.model, voice, full_text, self.client.audio_format)
+        audio_bytes = self._cached_audio(key)
+        if audio_bytes is not None:
+            return audio_bytes
+        try:
+            audio_bytes = self.client.synthesize(self.model, voice, full_text)
+        except Exception as exc:
+            callbacks.status("Error")
+            callbacks.log(f"Error generating audio: {exc}")
+            callbacks.status("Idle")
+            return None
+        self._remember_audio(key, audio_bytes)
+        return audio_bytes
+
+    def speak(
+        self,
+        text: str,
+        voice: str,
+        style_prefix: str,
+        streaming: bool,
+        callbacks: Optional[TTSCallbacks] = None,
+        latency_mode: Optional[int] = None,
+    ) -> None:
+        """Speak ``text`` with ``style_prefix`` (from StyleState.build_prefix()) prepended."""
+        callbacks = callbacks or _NULL_CALLBACKS
+        full_text = self._prepare(text, style_prefix, callbacks)
+        if full_text is None:
+            return
 
         if streaming:
+            key = (self.model, voice, full_text, "pcm")
+            block_seconds = PCM_BLOCK_SECONDS if latency_mode is None else LATENCY_BLOCK_SECONDS[latency_mode]
             try:
-                self.client.stream_and_play(self.model, voice, full_text)
-                callbacks.log("Streaming playback completed")
-                callbacks.status("Idle")
-                return
+                cached = self._cached_audio(key)
+                if cached is not None:
+                    callbacks.status("Playing")
+                    self.audio.play_pcm_stream((cached,), callbacks.cancel_event, block_seconds)
+                else:
+                    received = bytearray()
+                    pcm = self.client.iter_pcm(self.model, voice, full_text, cancel=callbacks.cancel_event)
+                    source = _recording(pcm, received)
+                    self.audio.play_pcm_stream(_until_cancelled(source, callbacks), callbacks.cancel_event, block_seconds)
+                    # Only complete clips are worth replaying.
+                    if not callbacks.cancelled():
+                        self._remember_audio(key, received)
             except Exception as exc:
+                if callbacks.cancelled():
+                    # Aborted (e.g. the client was closed on exit); do not refetch.
+                    callbacks.log("Playback cancelled")
+                    callbacks.status("Idle")
+                    return
                 callbacks.log(f"Streaming failed, falling back: {exc}")
+            else:
+                if callbacks.cancelled():
+                    callbacks.log("Playback cancelled")
+                else:
+                    callbacks.log("Streaming playback completed")
+                callbacks.status("Idle")
+                return
 
-        if not self.audio.available():
-            callbacks.status("Error")
-            callbacks.log("Error: Audio playback not available")
-            callbacks.status("Idle")
-            return
+        audio_bytes = self._fetch(full_text, voice, callbacks)
+        if audio_bytes is not None:
+            self.play(audio_bytes, callbacks)
 
-        try:
-            audio_bytes = self.client.synthesize(self.model, voice, full_text)
-        except Exception as exc:
-            callbacks.status("Error")
-            callbacks.log(f"Error generating audio: {exc}")
+    def synthesize(
+        self, text: str, voice: str, style_prefix: str, callbacks: Optional[TTSCallbacks] = None
+    ) -> Optional[bytearray]:
+        """Fetch audio for ``text`` without playing it; None if skipped or failed.
+
+        Lets callers request the next utterance while the current one plays.
+        Since that clip may still be playing, progress and errors go to the
+        log only; the status line is left to whoever plays the result.
+        """
+        callbacks = callbacks or _NULL_CALLBACKS
+        callbacks = TTSCallbacks(on_log=callbacks.on_log, cancel_event=callbacks.cancel_event)
+        full_text = self._prepare(text, style_prefix, callbacks)
+        if full_text is None:
+            return None
+        return self._fetch(full_text, voice, callbacks)
+
+    def play(self, audio_bytes: bytes, callbacks: Optional[TTSCallbacks] = None) -> None:
+        """Play audio returned by synthesize(), reporting progress via callbacks."""
+        callbacks = callbacks or _NULL_CALLBACKS
+        if callbacks.cancelled():
+            callbacks.log("Playback cancelled")
             callbacks.status("Idle")
             return
 
@@ -77,7 +256,12 @@ class TTSEngine:
         callbacks.log("Playing audio...")
 
         try:
-            self.audio.play_bytes(audio_bytes)
+            if self.client.audio_format == "pcm":
+                # Raw PCM has no container for the music decoder; it goes to the
+                # mixer as-is, the same way streamed chunks do.
+                self.audio.play_pcm_stream((audio_bytes,), callbacks.cancel_event)
+            else:
+                self.audio.play_bytes(audio_bytes, callbacks.cancel_event, self.client.audio_format)
         except Exception as exc:
             callbacks.status("Error")
             callbacks.log(f"Error during playback: {exc}")
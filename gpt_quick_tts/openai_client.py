@@ -3,34 +3,119 @@ from __future__ import annotations
 """Wrapper around OpenAI's TTS endpoints."""
 
 import os
-from typing import Optional
-
-from openai import OpenAI
+import queue
+import threading
+from typing import TYPE_CHECKING, Iterator, Optional
 
 from .async_utils import AsyncLoopThread
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
 # Optional base URL to route OpenAI-compatible requests through a proxy.
 # Default to the proxy path for api.castralhub.com/openai/v1 so packaged EXEs
 # will use the forwarding URL unless overridden by the environment.
 DEFAULT_BASE_URL = "https://api.castralhub.com/openai/v1"
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Container for non-streaming requests. Streaming always uses raw PCM (no decode
+# latency, but ~10x the bytes); on slow links "opus" cuts the download size
+# sharply versus "mp3", while "pcm" or "wav" skip decoding entirely. Must be
+# "pcm" or a format pygame can decode: mp3, opus, flac, wav.
+TTS_AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "mp3")
+
+# Keep-alive pool size shared by the sync and async HTTP clients.
+HTTP_MAX_KEEPALIVE = 8
+# Idle seconds before a pooled connection is dropped. httpx defaults to 5s,
+# shorter than the typical pause while typing the next line, which would
+# force a fresh TLS handshake for almost every request.
+HTTP_KEEPALIVE_EXPIRY = 120.0
+# How often a stream reader waiting for the next chunk checks for cancellation.
+STREAM_POLL_SECONDS = 0.05
+
+
+def _http_client_kwargs() -> dict:
+    """Connection-pool settings for the SDK's httpx clients.
+
+    HTTP/2 lets concurrent requests share one connection, but needs the
+    optional ``h2`` package, so it is only enabled when that is installed.
+    """
+    import httpx
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        http2 = False
+    else:
+        http2 = True
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            max_connections=HTTP_MAX_KEEPALIVE * 2,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _read_body(response) -> bytearray:
+    """Read a streamed HTTP body into a single buffer.
+
+    When Content-Length is known the buffer is allocated once and filled in
+    place, avoiding the chunk list + join that building ``.content`` implies.
+    """
+    try:
+        length = int(response.headers.get("content-length") or 0)
+    except (TypeError, ValueError):
+        length = 0
+
+    buf = bytearray(length)
+    view = memoryview(buf)
+    pos = 0
+    for chunk in response.iter_bytes():
+        end = pos + len(chunk)
+        if end <= length:
+            view[pos:end] = chunk
+        else:
+            # Unknown or understated length: grow the buffer instead.
+            view.release()
+            del buf[pos:]
+            buf += chunk
+            view = memoryview(buf)
+            length = end
+        pos = end
+    view.release()
+    if pos < len(buf):
+        del buf[pos:]
+    return buf
 
 
 class OpenAITTSClient:
     """Small wrapper that keeps OpenAI specifics out of UI code."""
 
-    def __init__(self, api_key: Optional[str] = None, async_runner: Optional[AsyncLoopThread] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        async_runner: Optional[AsyncLoopThread] = None,
+        audio_format: Optional[str] = None,
+    ):
         self._async_runner = async_runner
+        self.audio_format = audio_format or TTS_AUDIO_FORMAT
+        # Only a runner created here (not one passed in) is stopped by close().
+        self._owns_runner = False
         self._api_key = api_key or OPENAI_API_KEY
         self._base_url = OPENAI_BASE_URL
+        # The SDK (and its httpx/pydantic graph) is imported on first request.
         self.client: Optional[OpenAI] = None
-
-        if self._api_key:
-            self.client = self._build_client(self._api_key)
+        # Built once and reused so streaming requests share one connection pool.
+        self._async_client: Optional[AsyncOpenAI] = None
+        # sounddevice-backed player for stream_and_play, created on first use.
+        self._player = None
 
     def _build_client(self, api_key: str) -> OpenAI:
-        kwargs = {"api_key": api_key}
+        from openai import DefaultHttpxClient, OpenAI
+
+        kwargs = {"api_key": api_key, "http_client": DefaultHttpxClient(**_http_client_kwargs())}
         if self._base_url:
             kwargs["base_url"] = self._base_url
         return OpenAI(**kwargs)
@@ -49,36 +134,131 @@ class OpenAITTSClient:
         self.client = self._build_client(key)
         return self.client
 
-    def synthesize(self, model: str, voice: str, text: str, instructions: Optional[str] = None) -> bytes:
-        """Return raw audio bytes for the provided text."""
+    def _ensure_async_client(self) -> AsyncOpenAI:
+        """Return the shared AsyncOpenAI client (must be called on the runner loop)."""
+        if self._async_client:
+            return self._async_client
+
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
         client = self._ensure_client()
-        kwargs = {"model": model, "voice": voice, "input": text}
+        async_kwargs = {
+            "api_key": getattr(client, "api_key", None),
+            "http_client": DefaultAsyncHttpxClient(**_http_client_kwargs()),
+        }
+        if self._base_url:
+            async_kwargs["base_url"] = self._base_url
+        self._async_client = AsyncOpenAI(**async_kwargs)
+        return self._async_client
+
+    def _runner(self) -> AsyncLoopThread:
+        if self._async_runner is None:
+            self._async_runner = AsyncLoopThread()
+            self._owns_runner = True
+        return self._async_runner
+
+    def close(self) -> None:
+        """Release pooled HTTP connections held by the sync/async clients."""
+        if self._async_client and self._async_runner:
+            try:
+                self._async_runner.run_coroutine(self._async_client.close(), timeout=2.0)
+            except Exception:
+                pass
+        self._async_client = None
+        if self._owns_runner and self._async_runner:
+            self._async_runner.stop(timeout=2.0)
+            self._async_runner = None
+            self._owns_runner = False
+        if self.client:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+        self.client = None
+
+    def synthesize(self, model: str, voice: str, text: str, instructions: Optional[str] = None) -> bytearray:
+        """Return encoded audio (in ``self.audio_format``) for the provided text."""
+        client = self._ensure_client()
+        kwargs = {"model": model, "voice": voice, "input": text, "response_format": self.audio_format}
         if instructions:
             kwargs["instructions"] = instructions
-        response = client.audio.speech.create(**kwargs)
-        return response.content
+        with client.audio.speech.with_streaming_response.create(**kwargs) as response:
+            return _read_body(response)
 
-    def stream_and_play(self, model: str, voice: str, text: str, instructions: Optional[str] = None) -> None:
-        """Stream audio and play it locally with low latency."""
+    def iter_pcm(
+        self,
+        model: str,
+        voice: str,
+        text: str,
+        instructions: Optional[str] = None,
+        chunk_size: int = 4096,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[bytes]:
+        """Yield raw PCM chunks (24 kHz s16le mono) as they arrive from the API.
+
+        The HTTP stream is consumed on the shared async loop and handed to the
+        calling thread through a queue, so playback can start with the first
+        chunk while the rest is still downloading. Setting ``cancel`` ends the
+        iteration and aborts the request even while no data is arriving.
+        """
+        chunks: "queue.Queue[object]" = queue.Queue()
+        done = object()
+
+        async def _produce():
+            try:
+                async_client = self._ensure_async_client()
+                params = {"model": model, "voice": voice, "input": text, "response_format": "pcm"}
+                if instructions:
+                    params["instructions"] = instructions
+                async with async_client.audio.speech.with_streaming_response.create(**params) as response:
+                    async for chunk in response.iter_bytes(chunk_size=chunk_size):
+                        chunks.put(chunk)
+            finally:
+                chunks.put(done)
+
+        future = self._runner().submit(_produce())
         try:
-            from openai import AsyncOpenAI
-            from openai.helpers import LocalAudioPlayer
-        except Exception as exc:
-            raise RuntimeError("Streaming playback not available: missing AsyncOpenAI/LocalAudioPlayer") from exc
+            while True:
+                try:
+                    item = chunks.get(timeout=STREAM_POLL_SECONDS)
+                except queue.Empty:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    continue
+                if item is done:
+                    break
+                yield item
+            # Surface network/API errors raised by the producer.
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
 
-        async def _stream():
-            client = self._ensure_client()
-            async_kwargs = {"api_key": getattr(client, "api_key", None)}
-            if self._base_url:
-                async_kwargs["base_url"] = self._base_url
+    def _local_player(self):
+        """Return the SDK's LocalAudioPlayer, importing and building it once."""
+        if self._player is None:
+            try:
+                from openai.helpers import LocalAudioPlayer
+            except Exception as exc:
+                raise RuntimeError("Streaming playback not available: missing LocalAudioPlayer") from exc
+            self._player = LocalAudioPlayer()
+        return self._player
 
-            async_client = AsyncOpenAI(**async_kwargs)
+    def stream_and_play(self, model: str, voice: str, text: str, instructions: Optional[str] = None) -> None:
+        """Stream audio and play it with the SDK's LocalAudioPlayer (sounddevice).
+
+        TTSEngine plays streamed audio through ``iter_pcm`` and its own
+        AudioOutput instead; this is kept for callers without an AudioOutput.
+        """
+        player = self._local_player()
+
+        async def _stream():
+            async_client = self._ensure_async_client()
             params = {"model": model, "voice": voice, "input": text, "response_format": "pcm"}
             if instructions:
                 params["instructions"] = instructions
 
             async with async_client.audio.speech.with_streaming_response.create(**params) as response:
-                await LocalAudioPlayer().play(response)
+                await player.play(response)
 
-        runner = self._async_runner or AsyncLoopThread()
-        runner.run_coroutine(_stream())
+        self._runner().run_coroutine(_stream())
@@ -2,32 +2,78 @@ from __future__ import annotations
 
 """Mutable state for the console app (voice, styles, logs, status)."""
 
+import atexit
 import os
+import queue
 import threading
+import time
 from collections import deque
-from datetime import datetime
 from pathlib import Path
-from typing import Deque, List
+from typing import Dict, Optional, Sequence, TextIO, Tuple
 
-from .config import AppConfig, ConfigStore
+from .config import DEFAULT_LATENCY_MODE, LATENCY_MODES, AppConfig, ConfigStore
 from .styles import StyleState
 
 
+# Number of recent log lines kept in memory for the UI.
+LOG_HISTORY = 20
+# Buffered log lines are flushed to disk at most this often (seconds).
+LOG_FLUSH_INTERVAL = 1.0
+
+
 class ConsoleState:
-    def __init__(self, config_store: ConfigStore, styles: StyleState, voices: List[str]):
+    __slots__ = (
+        "_lock",
+        "_logs",
+        "_log_lines",
+        "_pending_logs",
+        "_config_store",
+        "styles",
+        "voices",
+        "_next_voice",
+        "status",
+        "voice",
+        "streaming",
+        "latency_mode",
+        "_log_path",
+        "_log_fp",
+        "_last_flush",
+        "_cfg",
+        "_ts_second",
+        "_ts_text",
+    )
+
+    def __init__(self, config_store: ConfigStore, styles: StyleState, voices: Sequence[str]):
         self._lock = threading.Lock()
-        self._logs: Deque[str] = deque(maxlen=20)
+        # Worker threads only enqueue raw (epoch second, message, persist_only)
+        # entries; formatting and file I/O happen when the UI reads the log.
+        self._pending_logs: "queue.SimpleQueue[Tuple[int, str, bool]]" = queue.SimpleQueue()
+        # Bounded ring buffer filled under the lock; readers get an immutable
+        # snapshot swapped on change, so renders need no copy.
+        self._log_lines: "deque[str]" = deque(maxlen=LOG_HISTORY)
+        self._logs: Tuple[str, ...] = ()
         self._config_store = config_store
         self.styles = styles
-        self.voices = voices
+        # Deduplicated (order kept) so the count and Ctrl+V cycle are accurate.
+        self.voices: Tuple[str, ...] = tuple(dict.fromkeys(voices))
+        # voice -> following voice, so Ctrl+V is a single dict lookup.
+        self._next_voice: Dict[str, str] = {
+            voice: self.voices[(i + 1) % len(self.voices)] for i, voice in enumerate(self.voices)
+        }
         self.status = "Initializing"
-        self.voice = voices[0] if voices else "alloy"
+        self.voice = self.voices[0] if self.voices else "alloy"
         self.streaming = False
+        self.latency_mode = DEFAULT_LATENCY_MODE
         self._log_path = self._resolve_log_path()
-
-        cfg = self._config_store.load()
-        cfg.ensure_style_defaults(self.styles.names)
-        self._apply_config(cfg)
+        self._log_fp: Optional[TextIO] = self._open_log()
+        self._last_flush = time.monotonic()
+        self._ts_second = -1
+        self._ts_text = ""
+
+        # Loaded once and kept in memory; toggles mutate it and persist.
+        self._cfg = self._config_store.load()
+        self._cfg.ensure_style_defaults(self.styles.names)
+        self._apply_config(self._cfg)
         self.status = "Idle"
 
     def _resolve_log_path(self) -> Path:
@@ -37,36 +83,78 @@ class ConsoleState:
         # Place logs alongside the config by default.
         return self._config_store.path.with_name("tts_console.log")
 
+    def _open_log(self) -> Optional[TextIO]:
+        """Open the log file once for the app lifetime (buffered appends)."""
+        try:
+            self._log_path.parent.mkdir(parents=True, exist_ok=True)
+            fp = self._log_path.open("a", encoding="utf-8", buffering=8192)
+        except Exception:
+            # Logging should never break the UI.
+            return None
+        atexit.register(self.close)
+        return fp
+
+    def close(self) -> None:
+        """Write out queued log entries, then flush and close the log file."""
+        self._drain_logs()
+        with self._lock:
+            fp, self._log_fp = self._log_fp, None
+        if fp:
+            try:
+                fp.close()
+            except Exception:
+                pass
+
     def _apply_config(self, cfg: AppConfig) -> None:
         if cfg.voice in self.voices:
             self.voice = cfg.voice
         self.streaming = bool(cfg.streaming)
+        if 0 <= cfg.latency_mode < LATENCY_MODES:
+            self.latency_mode = cfg.latency_mode
         self.styles.update_from_config(cfg.styles)
         self._persist(cfg)
 
     def _persist(self, cfg: AppConfig) -> None:
         cfg.voice = self.voice
         cfg.streaming = self.streaming
+        cfg.latency_mode = self.latency_mode
         cfg.styles = self.styles.to_config()
-        self._config_store.save(cfg)
-
-    def _load_config(self) -> AppConfig:
-        cfg = self._config_store.load()
-        cfg.ensure_style_defaults(self.styles.names)
-        return cfg
+        self._config_store.schedule_save(cfg)
 
     # Logging helpers
+    def _timestamp(self, second: int) -> str:
+        """Return HH:MM:SS for ``second``, formatting at most once per second."""
+        if second != self._ts_second:
+            self._ts_text = time.strftime("%H:%M:%S", time.localtime(second))
+            self._ts_second = second
+        return self._ts_text
+
     def add_log(self, message: str, *, persist_only: bool = False) -> None:
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        line = f"[{timestamp}] {message}"
-        with self._lock:
-            if not persist_only:
-                self._logs.append(line)
-            self._append_log(line)
+        # Cheap and lock-free so TTS workers are not slowed by formatting or I/O.
+        self._pending_logs.put((int(time.time()), message, persist_only))
 
-    def logs(self) -> List[str]:
+    def _drain_logs(self) -> None:
+        pending = self._pending_logs
+        if pending.empty():
+            return
         with self._lock:
-            return list(self._logs)
+            changed = False
+            while True:
+                try:
+                    second, message, persist_only = pending.get_nowait()
+                except queue.Empty:
+                    break
+                line = f"[{self._timestamp(second)}] {message}"
+                if not persist_only:
+                    self._log_lines.append(line)
+                    changed = True
+                self._append_log(line)
+            if changed:
+                self._logs = tuple(self._log_lines)
+
+    def logs(self) -> Tuple[str, ...]:
+        self._drain_logs()
+        return self._logs
 
     def archive_user_text(self, text: str) -> None:
         if not text:
@@ -74,10 +162,14 @@ class ConsoleState:
         self.add_log(f"User input: {text}", persist_only=True)
 
     def _append_log(self, line: str) -> None:
+        if not self._log_fp:
+            return
         try:
-            self._log_path.parent.mkdir(parents=True, exist_ok=True)
-            with self._log_path.open("a", encoding="utf-8") as fp:
-                fp.write(line + "\n")
+            self._log_fp.write(line + "\n")
+            now = time.monotonic()
+            if now - self._last_flush >= LOG_FLUSH_INTERVAL:
+                self._log_fp.flush()
+                self._last_flush = now
         except Exception:
             # Logging should never break the UI.
             pass
@@ -89,25 +181,23 @@ class ConsoleState:
     # Style / voice toggles
     def toggle_style(self, name: str) -> bool:
         new_state = self.styles.toggle(name)
-        cfg = self._load_config()
-        self._persist(cfg)
+        self._persist(self._cfg)
         return new_state
 
     def toggle_streaming(self) -> bool:
         self.streaming = not self.streaming
-        cfg = self._load_config()
-        self._persist(cfg)
+        self._persist(self._cfg)
         return self.streaming
 
+    def cycle_latency_mode(self) -> int:
+        self.latency_mode = (self.latency_mode + 1) % LATENCY_MODES
+        self._persist(self._cfg)
+        return self.latency_mode
+
     def cycle_voice(self) -> str:
         if not self.voices:
             return self.voice
-        try:
-            idx = self.voices.index(self.voice)
-        except ValueError:
-            idx = 0
-        idx = (idx + 1) % len(self.voices)
-        self.voice = self.voices[idx]
-        cfg = self._load_config()
-        self._persist(cfg)
+        # Unknown current voices restart the cycle at the second entry, as before.
+        self.voice = self._next_voice.get(self.voice) or self._next_voice[self.voices[0]]
+        self._persist(self._cfg)
         return self.voice
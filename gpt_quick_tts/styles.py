@@ -2,11 +2,17 @@ from __future__ import annotations
 
 """Style tokens, voices, and helpers."""
 
+import sys
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
 
 
-@dataclass(frozen=True)
+# ``slots=True`` drops the per-instance __dict__ where supported (3.10+).
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class StyleDefinition:
     name: str
     token: str
@@ -14,7 +20,7 @@ class StyleDefinition:
     default: bool = False
 
 
-DEFAULT_STYLES: List[StyleDefinition] = [
+DEFAULT_STYLES: Tuple[StyleDefinition, ...] = (
     StyleDefinition("Teaching", "<<style:teaching, clear, friendly>>", hotkey="t"),
     StyleDefinition("Calm", "<<style:calm, gentle>>", hotkey="c"),
     StyleDefinition("Excited", "<<style:excited, energetic>>", hotkey="e"),
@@ -31,9 +37,14 @@ DEFAULT_STYLES: List[StyleDefinition] = [
     StyleDefinition("Melancholic", "<<style:melancholic, slow, soft>>", hotkey="m"),
     StyleDefinition("Dramatic", "<<style:dramatic, emphatic>>", hotkey="d"),
     StyleDefinition("Cheerful", "<<style:cheerful, bright>>", hotkey="l"),
-]
+)
+
+# Legacy name -> token mapping for the default styles (interned tokens).
+STYLE_TOKENS: Dict[str, str] = {d.name: sys.intern(d.token) for d in DEFAULT_STYLES}
+# The same pairs in declaration order, for build_style_prefix.
+_DEFAULT_STYLE_ITEMS: Tuple[Tuple[str, str], ...] = tuple(STYLE_TOKENS.items())
 
-VOICES: List[str] = [
+VOICES: Tuple[str, ...] = (
     "alloy",
     "ash",
     "ballad",
@@ -44,79 +55,157 @@ VOICES: List[str] = [
     "onyx",
     "sage",
     "shimmer",
-]
+)
 
 
 class StyleState:
-    """Track which styles are active and provide view-friendly accessors."""
+    """Track which styles are active and provide view-friendly accessors.
+
+    Active styles are stored as a bitmask aligned with the definition order,
+    so toggling is an integer XOR and prefixes are memoized per mask.
+    """
+
+    __slots__ = (
+        "_definitions",
+        "_order",
+        "_names",
+        "_order_view",
+        "_hotkey_map",
+        "_tokens",
+        "_bits",
+        "_active_mask",
+        "_extra",
+        "_prefix_cache",
+        "_label_cache",
+        "_version",
+        "_display_snapshot",
+    )
 
     def __init__(self, definitions: Sequence[StyleDefinition], initial: Optional[Dict[str, bool]] = None):
         self._definitions = {d.name: d for d in definitions}
         self._order = list(definitions)
+        # Definitions are immutable after construction, so derived views are
+        # computed once here rather than on every access.
+        self._names: Tuple[str, ...] = tuple(self._definitions)
+        self._order_view: Tuple[StyleDefinition, ...] = tuple(self._order)
+        self._hotkey_map: Mapping[str, str] = MappingProxyType(
+            {d.hotkey.lower(): d.name for d in self._order if d.hotkey}
+        )
+        self._tokens: Tuple[str, ...] = tuple(d.token for d in self._order)
+        self._bits: Dict[str, int] = {}
+        for index, definition in enumerate(self._order):
+            self._bits.setdefault(definition.name, 1 << index)
+        # Styles without a definition (only reachable via toggle/set) have no
+        # token, so they are tracked separately for is_active/to_config.
+        self._extra: Dict[str, bool] = {}
+        # build_prefix() results keyed by active mask; never needs invalidation.
+        self._prefix_cache: Dict[int, str] = {}
+        # (name, active) -> (label, style class); labels depend only on the definition.
+        self._label_cache: Dict[Tuple[str, bool], Tuple[str, str]] = {}
+
+        # Bumped on every state change so views can cheaply detect staleness.
+        self._version = 0
+        # (version, display_items result) for the last state rendered.
+        self._display_snapshot: Optional[Tuple[int, Tuple[Tuple[StyleDefinition, bool], ...]]] = None
+
         initial = initial or {}
-        self._state: Dict[str, bool] = {}
+        self._active_mask = 0
         for definition in self._order:
-            self._state[definition.name] = bool(initial.get(definition.name, definition.default))
+            if initial.get(definition.name, definition.default):
+                self._active_mask |= self._bits[definition.name]
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return self._names
 
     @property
-    def names(self) -> List[str]:
-        return list(self._definitions.keys())
+    def order(self) -> Tuple[StyleDefinition, ...]:
+        return self._order_view
 
     @property
-    def order(self) -> List[StyleDefinition]:
-        return list(self._order)
+    def version(self) -> int:
+        """Counter that changes whenever any style is toggled or set."""
+        return self._version
 
     def is_active(self, name: str) -> bool:
-        return bool(self._state.get(name, False))
+        bit = self._bits.get(name)
+        if bit is None:
+            return bool(self._extra.get(name, False))
+        return bool(self._active_mask & bit)
 
     def toggle(self, name: str) -> bool:
-        if name not in self._state:
+        self._version += 1
+        bit = self._bits.get(name)
+        if bit is None:
             # Unknown styles are initialized on first toggle.
-            self._state[name] = True
-            return True
-        self._state[name] = not self._state[name]
-        return self._state[name]
+            self._extra[name] = not self._extra.get(name, False)
+            return self._extra[name]
+        self._active_mask ^= bit
+        return bool(self._active_mask & bit)
 
     def set(self, name: str, value: bool) -> None:
-        if name not in self._state:
-            self._state[name] = bool(value)
+        self._version += 1
+        bit = self._bits.get(name)
+        if bit is None:
+            self._extra[name] = bool(value)
+        elif value:
+            self._active_mask |= bit
         else:
-            self._state[name] = bool(value)
+            self._active_mask &= ~bit
 
     def update_from_config(self, cfg_styles: Dict[str, bool]) -> None:
         for name, active in (cfg_styles or {}).items():
-            if name in self._state:
-                self._state[name] = bool(active)
+            if name in self._bits or name in self._extra:
+                self.set(name, active)
 
     def to_config(self) -> Dict[str, bool]:
-        return dict(self._state)
+        mask = self._active_mask
+        config = {name: bool(mask & bit) for name, bit in self._bits.items()}
+        config.update(self._extra)
+        return config
 
     def build_prefix(self) -> str:
         """Return concatenated control tokens for active styles."""
-        tokens = []
-        for definition in self._order:
-            if self._state.get(definition.name):
-                tokens.append(definition.token)
-        return "".join(tokens)
-
-    def display_items(self) -> List[tuple[StyleDefinition, bool]]:
-        """Return (definition, active) for rendering."""
-        return [(definition, self._state.get(definition.name, False)) for definition in self._order]
-
-    def hotkey_lookup(self) -> Dict[str, str]:
-        """Return lowercase hotkey -> style name mapping."""
-        mapping: Dict[str, str] = {}
-        for definition in self._order:
-            if definition.hotkey:
-                mapping[definition.hotkey.lower()] = definition.name
-        return mapping
+        mask = self._active_mask
+        prefix = self._prefix_cache.get(mask)
+        if prefix is None:
+            tokens = self._tokens
+            prefix = "".join(tokens[i] for i in range(len(tokens)) if mask & (1 << i))
+            self._prefix_cache[mask] = prefix
+        return prefix
+
+    def display_items(self) -> Tuple[Tuple[StyleDefinition, bool], ...]:
+        """Return (definition, active) for rendering; reused until the next change."""
+        snapshot = self._display_snapshot
+        if snapshot is not None and snapshot[0] == self._version:
+            return snapshot[1]
+        mask = self._active_mask
+        bits = self._bits
+        items = tuple((definition, bool(mask & bits[definition.name])) for definition in self._order)
+        self._display_snapshot = (self._version, items)
+        return items
+
+    def label_for(self, name: str, active: bool) -> Tuple[str, str]:
+        """Return the header label and style class for a style in the given state."""
+        key = (name, active)
+        cached = self._label_cache.get(key)
+        if cached is None:
+            definition = self._definitions.get(name)
+            hotkey = definition.hotkey.upper() if definition and definition.hotkey else "-"
+            state_text = "ON" if active else "OFF"
+            cached = (f"[{name} ({hotkey}) {state_text}]", "style_on" if active else "style_off")
+            self._label_cache[key] = cached
+        return cached
+
+    def hotkey_lookup(self) -> Mapping[str, str]:
+        """Return read-only lowercase hotkey -> style name mapping."""
+        return self._hotkey_map
 
 
 def build_style_prefix(styles: Dict[str, bool], definitions: Iterable[StyleDefinition] = DEFAULT_STYLES) -> str:
     """Helper for compatibility: build prefix from a dict of style -> active."""
-    ordered_defs = list(definitions)
-    tokens = []
-    for definition in ordered_defs:
-        if styles.get(definition.name):
-            tokens.append(definition.token)
-    return "".join(tokens)
+    if definitions is DEFAULT_STYLES:
+        items = _DEFAULT_STYLE_ITEMS
+    else:
+        items = tuple((d.name, d.token) for d in definitions)
+    return "".join([token for name, token in items if styles.get(name)])
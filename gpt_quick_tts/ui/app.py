@@ -2,14 +2,18 @@ from __future__ import annotations
 
 """Prompt-toolkit based console UI."""
 
+import asyncio
 import shutil
+import sys
 import threading
-from typing import Callable, List, Optional
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 
 from prompt_toolkit import Application
 from prompt_toolkit.application import get_app
-from prompt_toolkit.formatted_text import HTML, FormattedText
-import html as _html
+from prompt_toolkit.formatted_text import FormattedText
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import HSplit, Layout, Window
 from prompt_toolkit.layout.controls import FormattedTextControl
@@ -17,9 +21,42 @@ from prompt_toolkit.mouse_events import MouseButton, MouseEventType
 from prompt_toolkit.styles import Style
 from prompt_toolkit.widgets import TextArea
 
-from ..engine import TTSEngine, TTSCallbacks
+from ..engine import TTSEngine, TTSCallbacks, split_sentences
 from ..state import ConsoleState
-from ..styles import StyleDefinition
+
+
+# ``cancel_futures`` (3.9+) drops queued jobs on shutdown instead of running them.
+_SHUTDOWN_KWARGS = {"cancel_futures": True} if sys.version_info >= (3, 9) else {}
+# Seconds run() waits for background cleanup before returning. Executor
+# threads are still joined at interpreter exit, so cleanup aborts in-flight
+# work first rather than relying on this timeout.
+CLEANUP_TIMEOUT = 3.0
+# Minimum seconds between redraws, so bursts of status changes share a frame.
+REDRAW_INTERVAL = 0.016
+# How long a terminal-width reading is reused before the output is queried again.
+COLS_REFRESH_SECONDS = 0.1
+
+# Static header, separator and log fragments, built once at import.
+_HEADER_TOP = (
+    ("", "=" * 50 + "\n"),
+    ("class:title", "TTS Console - GPT Quick TTS\n"),
+    ("class:info", "Styles: Ctrl+(Key) — click labels to toggle\n"),
+)
+_HEADER_BOTTOM = ("", "-" * 42 + "\n")
+_SEPARATOR = FormattedText([("class:info", "================")])
+_LOG_TITLE = ("class:info", "\nLog:\n")
+_LOG_EMPTY = ("class:log", "(no messages yet)\n")
+
+_STYLE = Style.from_dict(
+    {
+        "title": "#ffffff bold",
+        "info": "#ffffff",
+        "style_on": "#00ff00 bold",
+        "style_off": "#ff0000",
+        "status": "#ffffff",
+        "log": "#808080",
+    }
+)
 
 
 class ConsoleApp:
@@ -29,109 +66,164 @@ class ConsoleApp:
         self.state = state
         self.engine = engine
         self.on_shutdown = on_shutdown
-        self._workers: List[threading.Thread] = []
+        # Two-stage pipeline: a small pool fetches audio (so the next utterance
+        # downloads while the current one plays) and a single player thread
+        # plays results in submission order.
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts")
+        self._play_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-play")
+        # Each job (tracked by its playback future) carries its own cancel event.
+        self._active_jobs: List[Tuple[Future, threading.Event]] = []
         self._quit_confirm = False
+        # Pending reset of the Ctrl+Q confirmation on the UI loop; replaced on each press.
+        self._quit_timer: Optional[asyncio.TimerHandle] = None
         self._app: Optional[Application] = None
+        # True while a redraw request is queued on the event loop.
+        self._invalidate_pending = False
+        # Last rendered header as (state key, fragments); reused while unchanged.
+        self._header_cache: Optional[Tuple[tuple, FormattedText]] = None
+        # Voice line as ((voice, streaming), fragment), so status-only changes reuse it.
+        self._voice_line_cache: Optional[Tuple[Tuple[str, bool], Tuple[str, str]]] = None
+        # Terminal width as (monotonic read time, columns); seeded here and
+        # re-read from the app's output once it is live.
+        self._cols_cache: Tuple[float, int] = (time.monotonic(), shutil.get_terminal_size((80, 20)).columns)
+        # Wrapped style labels as ((styles version, cols), fragments).
+        self._styles_block_cache: Optional[Tuple[Tuple[int, int], list]] = None
+        # Last rendered log as (log snapshot, formatted text).
+        self._log_cache: Optional[Tuple[Tuple[str, ...], FormattedText]] = None
+        # Mouse handlers per style name, built once instead of per render.
+        self._mouse_handlers: Dict[str, Callable] = {
+            definition.name: partial(self._on_style_click, definition.name) for definition in state.styles.order
+        }
 
     # ------------------------------------------------------------------ UI rendering
-    def _style_label(self, definition: StyleDefinition, active: bool) -> str:
-        hotkey = definition.hotkey.upper() if definition.hotkey else "-"
-        state_text = "ON" if active else "OFF"
-        return f"[{definition.name} ({hotkey}) {state_text}]"
+    def _on_style_click(self, name: str, mouse_event):
+        if mouse_event.event_type == MouseEventType.MOUSE_UP and mouse_event.button == MouseButton.LEFT:
+            self._toggle_style(name)
+            return None
+        return NotImplemented
+
+    def _render_styles_block(self, cols: int) -> list:
+        """Return the wrapped style-label fragments, cached per (styles version, width)."""
+        styles = self.state.styles
+        key = (styles.version, cols)
+        cached = self._styles_block_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
 
-    def _render_header(self):
         fragments = []
-
-        def add(text: str, style: Optional[str] = None, handler=None):
-            cls = f"class:{style}" if style else ""
-            if handler:
-                fragments.append((cls, text, handler))
-            else:
-                fragments.append((cls, text))
-
-        # Helpers
-        try:
-            cols = get_app().output.get_size().columns
-        except Exception:
-            cols = shutil.get_terminal_size((80, 20)).columns
-
-        add("=" * 50 + "\n")
-        add("TTS Console - GPT Quick TTS\n", "title")
-        add("Styles: Ctrl+(Key) — click labels to toggle\n", "info")
-
-        cur_len = 0
-        first_in_line = True
-
-        for definition, active in self.state.styles.display_items():
-            label = self._style_label(definition, active)
-
-            def handler_factory(name: str):
-                def handler(mouse_event):
-                    try:
-                        if (
-                            getattr(mouse_event, "event_type", None) == MouseEventType.MOUSE_UP
-                            and getattr(mouse_event, "button", None) == MouseButton.LEFT
-                        ):
-                            self._toggle_style(name)
-                            return None
-                        return NotImplemented
-                    except Exception:
-                        return NotImplemented
-
-                return handler
-
-            handler = handler_factory(definition.name)
-            label_len = len(label) + (0 if first_in_line else 1)
-            if cur_len + label_len > max(10, cols - 10):
-                add("\n")
-                cur_len = 0
-                first_in_line = True
-
-            if not first_in_line:
-                add(" ")
-                cur_len += 1
-
-            style_class = "style_on" if active else "style_off"
-            add(label, style_class, handler)
-            cur_len += len(label)
-            first_in_line = False
-
-        add("\n")
-        voice_line = f"Voice: [{self.state.voice}] ({len(self.state.voices)} available) - Ctrl+V to cycle | Streaming: {'ON' if self.state.streaming else 'OFF'} (Ctrl+S)\n"
-        add(voice_line, "info")
-        add(f"Status: [{self.state.status}]\n", "status")
-        add("-" * 42 + "\n")
+        limit = max(10, cols - 10)
+        line_len = 0
+
+        for definition, active in styles.display_items():
+            label, style_class = styles.label_for(definition.name, active)
+            label_len = len(label)
+            if line_len and line_len + 1 + label_len > limit:
+                fragments.append(("", "\n"))
+                line_len = 0
+            elif line_len:
+                fragments.append(("", " "))
+                line_len += 1
+
+            fragments.append((f"class:{style_class}", label, self._mouse_handlers[definition.name]))
+            line_len += label_len
+
+        self._styles_block_cache = (key, fragments)
         return fragments
 
+    def _render_header(self):
+        cols = self._cols()
+        state = self.state
+        # The voice list is fixed when ConsoleState is built, so it is not part of the key.
+        key = (
+            cols,
+            state.voice,
+            state.streaming,
+            state.latency_mode,
+            state.status,
+            state.styles.version,
+        )
+        cached = self._header_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        fragments = list(_HEADER_TOP)
+        fragments.extend(self._render_styles_block(cols))
+        fragments.append(("", "\n"))
+        fragments.append(self._render_voice_line())
+        fragments.append(("class:info", f"Latency: {state.latency_mode} (Ctrl+B, higher starts sooner)\n"))
+        fragments.append(("class:status", f"Status: [{state.status}]\n"))
+        fragments.append(_HEADER_BOTTOM)
+        # Wrapping once here means prompt_toolkit's to_formatted_text() returns it
+        # as-is on every frame instead of copying a plain list.
+        header = FormattedText(fragments)
+        self._header_cache = (key, header)
+        return header
+
+    def _render_voice_line(self) -> Tuple[str, str]:
+        state = self.state
+        key = (state.voice, state.streaming)
+        cached = self._voice_line_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        streaming = "ON" if state.streaming else "OFF"
+        text = f"Voice: [{state.voice}] ({len(state.voices)} available) - Ctrl+V to cycle | Streaming: {streaming} (Ctrl+S)\n"
+        fragment = ("class:info", text)
+        self._voice_line_cache = (key, fragment)
+        return fragment
+
     def _render_log(self):
+        # Fragments are built directly (no HTML markup, so nothing to escape or
+        # parse) and reused until ConsoleState swaps in a new log snapshot.
         log_lines = self.state.logs()
-        # Build a safe HTML block for the log. User-supplied log lines may contain
-        # characters that break XML/HTML parsing (e.g. stray '<' or '&'), so escape
-        # them first. If HTML parsing still fails for any reason, fall back to a
-        # plain FormattedText sequence so the UI won't crash.
-        log_lines = list(log_lines) if log_lines else []
+        cached = self._log_cache
+        if cached is not None and cached[0] is log_lines:
+            return cached[1]
+
+        fragments = [_LOG_TITLE]
         if log_lines:
-            safe_lines = [f"<log>{_html.escape(line)}</log>" for line in log_lines]
+            for line in log_lines:
+                fragments.append(("class:log", line + "\n"))
         else:
-            safe_lines = ["<log>(no messages yet)</log>"]
-
-        content = "\n".join(safe_lines)
-        text = f"\n<info>Log:</info>\n{content}\n"
-
+            fragments.append(_LOG_EMPTY)
+        rendered = FormattedText(fragments)
+        self._log_cache = (log_lines, rendered)
+        return rendered
+
+    def _cols(self) -> int:
+        """Return the terminal width, querying the output at most every COLS_REFRESH_SECONDS.
+
+        Polling on a short interval picks up resizes without hooking
+        prompt_toolkit's private resize handler.
+        """
+        read_at, cols = self._cols_cache
+        if time.monotonic() - read_at > COLS_REFRESH_SECONDS:
+            cols = self._refresh_cols()
+        return cols
+
+    def _refresh_cols(self) -> int:
         try:
-            return HTML(text)
+            cols = get_app().output.get_size().columns
         except Exception:
-            # If HTML parsing fails, return plain FormattedText so the UI remains
-            # stable. Preserve styles where possible by using the same class names.
-            fragments = [("class:info", "\nLog:\n")]
-            if log_lines:
-                for line in log_lines:
-                    fragments.append(("class:log", line + "\n"))
-            else:
-                fragments.append(("class:log", "(no messages yet)\n"))
-            return FormattedText(fragments)
+            cols = shutil.get_terminal_size((80, 20)).columns
+        self._cols_cache = (time.monotonic(), cols)
+        return cols
 
     def _invalidate(self):
+        """Queue one redraw on the UI loop; calls made before it runs are folded in."""
+        app = self._app
+        if app is None or self._invalidate_pending:
+            return
+        loop = getattr(app, "loop", None)
+        if loop is None:
+            return
+        self._invalidate_pending = True
+        try:
+            loop.call_soon_threadsafe(self._flush_invalidate)
+        except Exception:
+            self._invalidate_pending = False
+
+    def _flush_invalidate(self):
+        self._invalidate_pending = False
         try:
             if self._app:
                 self._app.invalidate()
@@ -145,6 +237,9 @@ class ConsoleApp:
         self.state.add_log(f"{name} style toggled {state_text}")
         self._invalidate()
 
+    def _on_style_key(self, name: str, event):
+        self._toggle_style(name)
+
     def _cycle_voice(self):
         new_voice = self.state.cycle_voice()
         self.state.add_log(f"Voice changed to {new_voice}")
@@ -155,7 +250,16 @@ class ConsoleApp:
         self.state.add_log(f"Streaming mode toggled {'ON' if new_state else 'OFF'}")
         self._invalidate()
 
+    def _cycle_latency(self):
+        mode = self.state.cycle_latency_mode()
+        self.state.add_log(f"Latency mode set to {mode}")
+        self._invalidate()
+
     def _set_status(self, status: str):
+        # Workers report the same status repeatedly (e.g. Idle after each
+        # sentence); only an actual change needs a redraw.
+        if status == self.state.status:
+            return
         self.state.set_status(status)
         self._invalidate()
 
@@ -166,38 +270,83 @@ class ConsoleApp:
         # Persist the full text to the log file even if the UI truncates entries.
         self.state.archive_user_text(text)
 
-        callbacks = TTSCallbacks(on_status=self._set_status, on_log=self.state.add_log)
-
-        def worker():
-            try:
-                self.engine.speak(text, self.state.voice, self.state.styles, self.state.streaming, callbacks)
-            finally:
-                self._invalidate()
+        cancel_event = threading.Event()
+        callbacks = TTSCallbacks(on_status=self._set_status, on_log=self.state.add_log, cancel_event=cancel_event)
+
+        # Snapshot the settings now so toggles made while earlier jobs play
+        # do not leak into text that was already submitted.
+        voice = self.state.voice
+        streaming = self.state.streaming
+        style_prefix = self.state.styles.build_prefix()
+        latency_mode = self.state.latency_mode
+        # Drop finished jobs so the list only tracks pending/running work.
+        self._active_jobs = [job for job in self._active_jobs if not job[0].done()]
+        # Without streaming, one request per sentence: the first one starts
+        # playing sooner and later ones are fetched while earlier ones play.
+        # A stream already plays while it downloads, and splitting it would put
+        # a fresh time-to-first-byte gap at every sentence boundary.
+        pieces = [text] if streaming else split_sentences(text)
+        for piece in pieces:
+            if streaming:
+                fetched = None
+            else:
+                fetched = self._pool.submit(self.engine.synthesize, piece, voice, style_prefix, callbacks)
+            future = self._play_pool.submit(
+                self._play_job, fetched, piece, voice, style_prefix, latency_mode, callbacks
+            )
+            future.add_done_callback(lambda _f: self._invalidate())
+            self._active_jobs.append((future, cancel_event))
+
+    def _play_job(
+        self,
+        fetched: Optional[Future],
+        text: str,
+        voice: str,
+        style_prefix: str,
+        latency_mode: int,
+        callbacks: TTSCallbacks,
+    ):
+        if fetched is None:
+            self.engine.speak(text, voice, style_prefix, True, callbacks, latency_mode)
+            return
+        if not fetched.done():
+            callbacks.status("Sending")
+        audio_bytes = fetched.result()
+        if audio_bytes is None:
+            # Skipped or failed; the fetch already logged why.
+            callbacks.status("Idle")
+            return
+        self.engine.play(audio_bytes, callbacks)
 
-        thread = threading.Thread(target=worker, daemon=False)
-        thread.start()
-        self._workers.append(thread)
+    def _cancel_all_jobs(self):
+        for future, cancel_event in self._active_jobs:
+            cancel_event.set()
+            future.cancel()
 
     def _confirm_quit(self, app: Application):
+        if self._quit_timer:
+            self._quit_timer.cancel()
+            self._quit_timer = None
         if self._quit_confirm:
+            self._cancel_all_jobs()
             app.exit()
             return
 
-        active_workers = [t for t in self._workers if t.is_alive()]
+        active_workers = [f for f, _ in self._active_jobs if not f.done()]
         if self.state.streaming or active_workers:
             self.state.add_log("Quit requested — active streaming/workers detected. Press Ctrl+Q again to confirm exit.")
         else:
             self.state.add_log("Press Ctrl+Q again within 2s to quit")
         self._invalidate()
         self._quit_confirm = True
+        # Key handlers run on the app's event loop, so schedule the reset there
+        # instead of starting a timer thread per press.
+        self._quit_timer = app.loop.call_later(2.0, self._reset_quit_confirm)
 
-        def _reset():
-            self._quit_confirm = False
-            self._invalidate()
-
-        timer = threading.Timer(2.0, _reset)
-        timer.daemon = True
-        timer.start()
+    def _reset_quit_confirm(self):
+        self._quit_timer = None
+        self._quit_confirm = False
+        self._invalidate()
 
     # ------------------------------------------------------------------ App lifecycle
     def run(self):
@@ -209,7 +358,7 @@ class ConsoleApp:
         log_control = FormattedTextControl(text=self._render_log, focusable=False)
         log_window = Window(content=log_control, height=13, dont_extend_height=True)
 
-        separator = Window(content=FormattedTextControl(text=HTML("<info>================</info>")), height=1, dont_extend_height=True)
+        separator = Window(content=FormattedTextControl(text=_SEPARATOR), height=1, dont_extend_height=True)
 
         root_container = HSplit([header_window, log_window, separator, Window(height=1), text_area])
         layout = Layout(root_container)
@@ -229,16 +378,17 @@ class ConsoleApp:
         def _(event):
             self._toggle_streaming()
 
-        # Style bindings
-        used_ctrl_keys = {"q", "v", "s", "enter"}
+        @kb.add("c-b")
+        def _(event):
+            self._cycle_latency()
+
+        # Style bindings, generated from the hotkey table; each binding is a
+        # partial so a key press goes straight to the toggle with its name.
+        used_ctrl_keys = {"q", "v", "s", "b", "enter"}
         blacklist = {"h", "m"}  # avoid common terminal navigation bindings
         for hotkey, name in self.state.styles.hotkey_lookup().items():
-            if hotkey in used_ctrl_keys or hotkey in blacklist:
-                continue
-
-            @kb.add(f"c-{hotkey}")
-            def _style_toggle(event, _name=name):
-                self._toggle_style(_name)
+            if hotkey not in used_ctrl_keys and hotkey not in blacklist:
+                kb.add(f"c-{hotkey}")(partial(self._on_style_key, name))
 
         @kb.add("enter")
         def _(event):
@@ -249,43 +399,63 @@ class ConsoleApp:
             if text == ":q":
                 event.app.exit()
                 return
+            # Nothing speakable (e.g. a stray "."); skip the request entirely.
+            if not any(c.isalnum() for c in text):
+                return
             self._submit_text(text)
             self._invalidate()
 
-        style = Style.from_dict(
-            {
-                "title": "#ffffff bold",
-                "info": "#ffffff",
-                "style_on": "#00ff00 bold",
-                "style_off": "#ff0000",
-                "status": "#ffffff",
-                "log": "#808080",
-            }
+        self._app = Application(
+            layout=layout,
+            key_bindings=kb,
+            style=_STYLE,
+            full_screen=True,
+            mouse_support=True,
+            min_redraw_interval=REDRAW_INTERVAL,
         )
-
-        self._app = Application(layout=layout, key_bindings=kb, style=style, full_screen=True, mouse_support=True)
-
         try:
-            self._app.run()
+            # Re-read the width from the app's own output once it is live.
+            self._app.run(pre_run=self._refresh_cols)
         finally:
-            self._cleanup()
+            cleanup = self._cleanup()
+            # Give in-flight work a grace period without letting it hold exit hostage.
+            cleanup.join(timeout=CLEANUP_TIMEOUT)
+
+    def _cleanup(self) -> threading.Thread:
+        """Cancel outstanding work now; release resources on a side thread."""
+        if self._quit_timer:
+            self._quit_timer.cancel()
+        self._cancel_all_jobs()
+        thread = threading.Thread(target=self._release_resources, name="tts-cleanup", daemon=True)
+        thread.start()
+        return thread
 
-    def _cleanup(self):
-        try:
-            for thread in list(self._workers):
-                try:
-                    thread.join(timeout=2.0)
-                except Exception:
-                    pass
-            if self.engine and getattr(self.engine, "audio", None):
-                try:
-                    self.engine.audio.close()
-                except Exception:
-                    pass
-            if self.on_shutdown:
-                try:
-                    self.on_shutdown()
-                except Exception:
-                    pass
-        finally:
-            pass
+    def _release_resources(self):
+        pools = (self._pool, self._play_pool)
+        # Drop queued jobs; running ones were signalled by _cancel_all_jobs.
+        for pool in pools:
+            try:
+                pool.shutdown(wait=False, **_SHUTDOWN_KWARGS)
+            except Exception:
+                pass
+        # Closing the HTTP clients and stopping the async runner aborts
+        # in-flight requests, so workers blocked on the network return now
+        # instead of after the response completes.
+        if self.on_shutdown:
+            try:
+                self.on_shutdown()
+            except Exception:
+                pass
+        for pool in pools:
+            try:
+                pool.shutdown(wait=True)
+            except Exception:
+                pass
+        # Only release the mixer once no worker can still be playing on it.
+        # TTSEngine always sets ``audio`` in its constructor.
+        audio = self.engine.audio
+        if audio:
+            try:
+                audio.close()
+            except Exception:
+                pass
@@ -0,0 +1,49 @@
+"""Process-pool tests for the CPU diarization path of batch_extract_teacher."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+pytest.importorskip("soundfile")
+pytest.importorskip("pyannote.audio")
+pytest.importorskip("speechbrain")
+
+import batch_extract_teacher as bet  # noqa: E402
+
+
+def _worker_threads():
+    return torch.get_num_threads()
+
+
+def _worker_has_pipeline():
+    return bet._WORKER_STATE.get("pipeline") is not None
+
+
+def _pool(initializer, initargs):
+    return ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=bet._DIARIZE_MP_CONTEXT,
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def test_worker_threads_after_parent_configured_torch():
+    # Same order as main(): threads are configured and torch has run before the pool starts.
+    bet.configure_threads(2)
+    torch.ones(32, 32) @ torch.ones(32, 32)
+
+    with _pool(bet._configure_worker_threads, (2,)) as pool:
+        assert pool.submit(_worker_threads).result(timeout=120) == 2
+
+
+@pytest.mark.skipif(not os.environ.get("HUGGINGFACE_TOKEN"), reason="needs HUGGINGFACE_TOKEN to load pyannote")
+def test_diarize_worker_initializer_in_real_pool():
+    bet.configure_threads(2)
+    torch.ones(32, 32) @ torch.ones(32, 32)
+
+    initargs = (os.environ["HUGGINGFACE_TOKEN"], 2, "WARNING")
+    with _pool(bet._init_diarize_worker, initargs) as pool:
+        assert pool.submit(_worker_has_pipeline).result(timeout=600)